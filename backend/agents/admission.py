@@ -0,0 +1,76 @@
+"""
+Admission control for LLM work in one service process.
+
+At most CREW_MAX_CONCURRENT_JOBS transcripts are processed at once per
+process. Synchronous requests that find every slot taken wait at most
+CREW_ADMISSION_WAIT seconds and are then turned away with 429 and a
+Retry-After estimated from recent job durations, so callers back off
+instead of piling up until they hit timeouts. Background jobs share the
+same slots but simply wait for one.
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+MAX_CONCURRENT_JOBS = int(os.getenv("CREW_MAX_CONCURRENT_JOBS", "4"))
+ADMISSION_WAIT_SECONDS = float(os.getenv("CREW_ADMISSION_WAIT", "0.5"))
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Service is at capacity, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Admission:
+    def __init__(self, limit=MAX_CONCURRENT_JOBS, wait=ADMISSION_WAIT_SECONDS):
+        self.limit = limit
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.average_seconds = 30.0  # moving average of job duration
+
+    def retry_after(self):
+        # Roughly when the next slot frees up
+        return max(1, int(round(self.average_seconds / max(1, self.limit))))
+
+    def acquire(self, block=False):
+        """Take one slot; raises Overloaded when none frees up in time and block is False."""
+        if not self._slots.acquire(timeout=None if block else self.wait):
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded(self.retry_after())
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+        return time.perf_counter()
+
+    def release(self, acquired_at):
+        elapsed = time.perf_counter() - acquired_at
+        with self._lock:
+            self.active -= 1
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * elapsed
+        self._slots.release()
+
+    @contextmanager
+    def slot(self, block=False):
+        acquired_at = self.acquire(block)
+        try:
+            yield
+        finally:
+            self.release(acquired_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "average_seconds": round(self.average_seconds, 2),
+                "retry_after": self.retry_after(),
+            }
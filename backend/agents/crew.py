@@ -1,15 +1,30 @@
 import os
 import json
 import logging
+import time
+import queue
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from crewai import Agent, Task, Crew, LLM
-from crewai_tools import tool
-from supabase import create_client
-from pydantic import BaseModel
 from typing import List, Optional
 
+from warmup import WarmUp
+from roster_cache import RosterCache, SharedInvalidations, ROSTER_COLUMNS, ROSTER_MAX_COMPANIES
+from name_index import NameIndexes
+import fast_extract
+import map_reduce
+import structured_engine
+import json_repair
+import email_templates
+import metrics
+from deadlines import normalize_deadlines
+from result_cache import ResultCache, cache_key, RESULT_CACHE_ENABLED
+from job_queue import JobQueue
+from admission import Admission, Overloaded
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,31 +41,83 @@ SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 if not all([GEMINI_KEY, SUPABASE_URL, SUPABASE_KEY]):
     raise RuntimeError("Missing required environment variables")
 
-# Initialize clients
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-llm = LLM(model="gemini/gemini-2.0-flash", temperature=0.2, api_key=GEMINI_KEY, provider="gemini")
+LLM_MODEL = "gemini/gemini-2.0-flash"
+# Bump whenever a prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSION = "3"
+# Rosters larger than this are cut down to the employees the transcript names
+PROMPT_ROSTER_MAX = int(os.getenv("PROMPT_ROSTER_MAX", "25"))
+# "crew": agent with the roster tool; "structured": one schema-constrained call
+ENGINES = ("crew", "structured")
+DEFAULT_ENGINE = os.getenv("CREW_ENGINE", "crew")
+SSE_KEEPALIVE_SECONDS = 15
+BATCH_MAX_ITEMS = int(os.getenv("CREW_BATCH_MAX_ITEMS", "20"))
+BATCH_CONCURRENCY = int(os.getenv("CREW_BATCH_CONCURRENCY", "4"))
+
+# Heavy dependencies (crewai, crewai_tools, supabase, pydantic) are imported
+# and the clients built on a background thread, so /health answers at once.
+warmup = WarmUp([
+    ("schemas", lambda: importlib.import_module("schemas")),
+    ("supabase", lambda: importlib.import_module("supabase")),
+    ("crewai", lambda: importlib.import_module("crewai")),
+    ("crewai_tools", lambda: importlib.import_module("crewai_tools")),
+    ("supabase_client", lambda: importlib.import_module("supabase").create_client(SUPABASE_URL, SUPABASE_KEY)),
+    ("llm", lambda: importlib.import_module("crewai").LLM(model=LLM_MODEL, temperature=0.2, api_key=GEMINI_KEY, provider="gemini")),
+    ("employees_tool", lambda: importlib.import_module("crewai_tools").tool(get_company_employees)),
+])
+
+def get_supabase():
+    """Supabase client, waiting for the warm-up if it is still running."""
+    return warmup.get("supabase_client")
+
+def get_llm():
+    return warmup.get("llm")
+
+def load_company_roster(company_id: str) -> List[dict]:
+    """Query the employees of a company (only the columns we use)."""
+    logger.info(f"🔍 Loading roster for company_id: {company_id}")
+    with metrics.timed("roster_fetch"):
+        response = get_supabase().from_("employees").select(ROSTER_COLUMNS).eq("company_id", company_id).execute()
+    return response.data or []
+
+# Invalidations reach every gunicorn worker through the shared stamps
+shared_invalidations = SharedInvalidations()
+roster_cache = RosterCache(load_company_roster, shared=shared_invalidations)
+
+def load_email_templates(company_id: str) -> dict:
+    """The company's email template overrides ({} for the defaults)."""
+    try:
+        response = get_supabase().from_("email_templates").select("subject, body").eq("company_id", company_id).execute()
+        return (response.data or [{}])[0]
+    except Exception as e:
+        # No email_templates table yet (email_templates.sql) or a transient error: use the defaults
+        logger.warning(f"⚠️ Could not load email templates for {company_id}: {e}")
+        return {}
 
-# Pydantic models for structured output
-class ActionItem(BaseModel):
-    employee_name: Optional[str] = None
-    employee_email: Optional[str] = None
-    task: str
-    deadline: Optional[str] = None
+# Same TTL/LRU cache as the roster, keyed by company; a roster invalidation refreshes it too
+email_template_cache = RosterCache(load_email_templates, shared=shared_invalidations)
+name_indexes = NameIndexes(ROSTER_MAX_COMPANIES)
 
-class MeetingSummary(BaseModel):
-    summary: str
-    action_items: List[ActionItem]
+def get_name_index(company_id: str, roster: Optional[List[dict]] = None):
+    """Fuzzy name index for the company's current roster."""
+    return name_indexes.for_roster(company_id, roster if roster is not None else roster_cache.get(company_id))
+
+def prompt_roster(text: str, roster: List[dict], index) -> List[dict]:
+    """The employees worth putting in a prompt about text."""
+    if len(roster) <= PROMPT_ROSTER_MAX:
+        return roster
+    mentioned = [employee for employee, _, _ in index.find_mentions(text)]
+    # Nobody recognisably named: the model needs the whole list to decide
+    return mentioned or roster
+result_cache = ResultCache()
 
-@tool
 def get_company_employees(company_id: str) -> str:
     """Fetch all employees for a company from the database."""
     try:
         logger.info(f"🔍 Fetching employees for company_id: {company_id}")
         
-        response = supabase.from_("employees").select("*").eq("company_id", company_id).execute()
+        employees = roster_cache.get(company_id)
         
-        if response.data:
-            employees = response.data
+        if employees:
             logger.info(f"✅ Found {len(employees)} employees")
             return json.dumps({
                 "employees": employees,
@@ -64,8 +131,9 @@ def get_company_employees(company_id: str) -> str:
         logger.error(f"❌ Error fetching employees: {e}")
         return json.dumps({"error": str(e), "employees": [], "count": 0})
 
-def create_summary_agent(company_id: str) -> Agent:
+def create_summary_agent(company_id: str):
     """Create the meeting summary agent with company context."""
+    from crewai import Agent
     return Agent(
         role="Meeting Summary Agent",
         goal=f"Summarize meetings and assign tasks to specific employees from company {company_id}",
@@ -80,14 +148,87 @@ Your job:
 
 IMPORTANT: You must use real employee emails from the database. Do not make up email addresses.
 """,
-        llm=llm,
-        tools=[get_company_employees],
+        llm=get_llm(),
+        tools=[warmup.get("employees_tool")],
         verbose=True
     )
 
-def process_meeting_transcript(transcript: str, company_id: str, user_id: str, meta: dict) -> dict:
-    """Process a meeting transcript and return structured data."""
+def meeting_date(meta: dict):
+    """Date deadlines are anchored to: meta.meeting_date (ISO) or today."""
+    try:
+        return datetime.fromisoformat(str(meta.get('meeting_date'))[:10]).date()
+    except ValueError:
+        return datetime.now().date()
+
+def no_event(name: str, data: Optional[dict] = None):
+    pass
+
+def process_meeting_transcript(transcript: str, company_id: str, user_id: str, meta: dict, engine: Optional[str] = None,
+                               on_event=no_event) -> dict:
+    """Process a meeting transcript and return structured data; on_event(name, data) reports progress."""
+    engine = engine or DEFAULT_ENGINE
+    try:
+        roster = roster_cache.get(company_id)
+        on_event("roster_loaded", {"employees": len(roster)})
+        today = meeting_date(meta)
+        
+        # Simple "Name, I need you to X by <date>" transcripts skip the LLM
+        if fast_extract.FAST_PATH_ENABLED and meta.get('fast_path', True):
+            started = time.perf_counter()
+            fast = fast_extract.extract(transcript, roster, today, get_name_index(company_id, roster))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            on_event("fast_path", {"confidence": fast['confidence'], "used": fast['confidence'] >= fast_extract.FAST_PATH_MIN_CONFIDENCE})
+            if fast['confidence'] >= fast_extract.FAST_PATH_MIN_CONFIDENCE:
+                logger.info(f"⏱️ Fast path extracted {len(fast['action_items'])} action items in {elapsed_ms:.1f} ms (confidence {fast['confidence']})")
+                metrics.set_engine("fast")
+                return fast
+            logger.info(f"🔍 Fast path confidence {fast['confidence']} too low, using the LLM")
+        
+        # Same transcript, roster, model, prompts and meeting date: reuse the earlier answer
+        key = cache_key(transcript, roster, f"{LLM_MODEL}/{engine}", PROMPT_VERSION, today)
+        if RESULT_CACHE_ENABLED and meta.get('bypass_cache'):
+            result_cache.record_bypass()
+        elif RESULT_CACHE_ENABLED:
+            try:
+                cached = result_cache.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Result cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"✅ Result cache hit for company {company_id}")
+                on_event("cache_hit", {"engine": cached.get('engine', engine)})
+                return cached
+        
+        on_event("llm_started", {"engine": "map_reduce" if map_reduce.needs_map_reduce(transcript) else engine})
+        
+        # Long meetings are extracted chunk by chunk instead of in one agent run
+        if map_reduce.needs_map_reduce(transcript):
+            metrics.set_engine("map_reduce")
+            result = process_long_transcript(transcript, company_id)
+        elif engine == "structured":
+            result = run_structured(transcript, company_id, roster, today)
+        else:
+            result = run_crew(transcript, company_id)
+        
+        if RESULT_CACHE_ENABLED and "error" not in result:
+            try:
+                result_cache.put(key, result)
+            except Exception as e:
+                logger.warning(f"⚠️ Result cache write failed: {e}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"❌ Error processing transcript: {e}")
+        return {
+            "summary": "Error processing meeting",
+            "action_items": [],
+            "error": str(e)
+        }
+
+def run_crew(transcript: str, company_id: str) -> dict:
+    """Run the summary agent over the whole transcript."""
     try:
+        from crewai import Task, Crew
         logger.info(f"🔍 Processing transcript for company: {company_id}")
         
         # Create agent
@@ -108,7 +249,6 @@ INSTRUCTIONS:
 2. Create a concise meeting summary
 3. Extract action items and assign them to specific employees using their exact email addresses from the database
 4. Set realistic deadlines based on the meeting context
-5. Create individual email notifications for employees with tasks
 
 Return a JSON object with this structure:
 {{
@@ -120,14 +260,6 @@ Return a JSON object with this structure:
             "task": "Specific task description",
             "deadline": "2025-MM-DD" or null
         }}
-    ],
-    "emails": [
-        {{
-            "employee_name": "Employee Name",
-            "employee_email": "employee@company.com",
-            "subject": "Task Assignment: [Task Name]",
-            "body": "Email body with task details..."
-        }}
     ]
 }}
 """,
@@ -137,10 +269,12 @@ Return a JSON object with this structure:
         
         # Execute
         crew = Crew(agents=[agent], tasks=[task], verbose=True)
-        result = crew.kickoff()
+        with metrics.timed("llm_call"):
+            result = crew.kickoff()
+        metrics.record_usage(getattr(result, "token_usage", None))
         
         # Parse result
-        return parse_crew_result(result)
+        return parse_crew_result(result, transcript)
         
     except Exception as e:
         logger.error(f"❌ Error processing transcript: {e}")
@@ -150,31 +284,97 @@ Return a JSON object with this structure:
             "error": str(e)
         }
 
-def parse_crew_result(result) -> dict:
-    """Parse the crew result into a structured format."""
+def run_structured(transcript: str, company_id: str, roster: List[dict], today) -> dict:
+    """One schema-constrained completion with the roster in the prompt."""
+    logger.info(f"🔍 Structured extraction for company: {company_id}")
+    employees = prompt_roster(transcript, roster, get_name_index(company_id, roster))
+    result = structured_engine.extract(transcript, employees, LLM_MODEL, GEMINI_KEY, today.isoformat())
+    result["engine"] = "structured"
+    return result
+
+def llm_complete(prompt: str) -> str:
+    """One plain completion, without the agent loop (same model settings as get_llm)."""
+    from litellm import completion
+    with metrics.timed("llm_call"):
+        response = completion(model=LLM_MODEL, api_key=GEMINI_KEY, temperature=0.2,
+                              messages=[{"role": "user", "content": prompt}])
+    metrics.record_usage(getattr(response, "usage", None))
+    return response.choices[0].message.content or ""
+
+def process_long_transcript(transcript: str, company_id: str) -> dict:
+    """Map-reduce extraction: each chunk gets the roster inline, no tool call."""
+    employees = roster_cache.get(company_id)
+    name_index = get_name_index(company_id, employees)
+    
+    def extract_chunk(chunk, index, total):
+        roster = structured_engine.project_roster(prompt_roster(chunk, employees, name_index))
+        prompt = f"""
+This is part {index + 1} of {total} of a meeting transcript.
+
+EMPLOYEES (name <email>):
+{roster}
+
+TRANSCRIPT PART:
+{chunk}
+
+Summarize this part in 2-3 sentences and list the action items it assigns.
+Only assign tasks to the employees above, using their exact email addresses.
+
+Return only a JSON object:
+{{"summary": "...", "action_items": [{{"employee_name": "...", "employee_email": "...", "task": "...", "deadline": "YYYY-MM-DD" or null}}]}}
+"""
+        try:
+            return parse_crew_result(llm_complete(prompt), chunk)
+        except Exception as e:
+            logger.error(f"❌ Error extracting chunk {index + 1}/{total}: {e}")
+            return {"summary": "", "action_items": []}
+    
+    def combine_summaries(summaries):
+        parts = "\n\n".join(f"Part {i + 1}: {s}" for i, s in enumerate(summaries))
+        try:
+            return llm_complete(f"""
+These are summaries of consecutive parts of one meeting:
+
+{parts}
+
+Write one concise summary of the whole meeting. Return only the summary text.
+""").strip()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not combine chunk summaries: {e}")
+            return " ".join(summaries)
+    
+    started = time.perf_counter()
+    result = map_reduce.map_reduce(transcript, extract_chunk, combine_summaries)
+    result["engine"] = "map_reduce"
+    logger.info(f"⏱️ Map-reduce over {result['chunks']} chunks took {time.perf_counter() - started:.1f}s")
+    return result
+
+def parse_crew_result(result, transcript: Optional[str] = None) -> dict:
+    """
+    Parse the crew result into a structured format. Broken or truncated JSON
+    is repaired locally; fields that still can't be recovered are asked for
+    once with a short completion when the transcript is given.
+    """
     try:
-        # Try to get JSON from result
-        if hasattr(result, 'json_dict') and result.json_dict:
-            return result.json_dict
-        
-        # Try to parse as string
-        result_str = str(result)
-        if result_str.strip().startswith('{'):
-            return json.loads(result_str)
-        
-        # Extract JSON from text
-        import re
-        json_match = re.search(r'(\{.*\})', result_str, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
+        with metrics.timed("result_parse"):
+            parsed, missing = json_repair.parse_meeting_summary(result)
+        if missing:
+            metrics.parse_failure()
+        if missing and transcript:
+            logger.info(f"🔍 Re-asking for missing fields: {', '.join(missing)}")
+            try:
+                parsed.update(json_repair.reask_missing(missing, transcript, llm_complete))
+            except Exception as e:
+                logger.warning(f"⚠️ Re-ask for missing fields failed: {e}")
         
         # Fallback
-        return {
-            "summary": result_str[:500] + "..." if len(result_str) > 500 else result_str,
-            "action_items": []
-        }
+        if not parsed["summary"] and not parsed["action_items"]:
+            result_str = json_repair.raw_text(result)
+            parsed["summary"] = result_str[:500] + "..." if len(result_str) > 500 else result_str
+        return parsed
         
     except Exception as e:
+        metrics.parse_failure()
         logger.error(f"❌ Error parsing result: {e}")
         return {
             "summary": "Error parsing meeting summary",
@@ -182,67 +382,103 @@ def parse_crew_result(result) -> dict:
             "error": str(e)
         }
 
+def resolve_employees(action_items: List[dict], company_id: str) -> dict:
+    """
+    Map lowercased email -> employee row for every email in action_items.
+    Uses the cached roster, then one `in_` query for the rest, then one bulk
+    upsert to create whoever is still missing.
+    """
+    emails = {}
+    for item in action_items:
+        email = (item.get('employee_email') or '').strip()
+        if email and email.lower() not in emails:
+            emails[email.lower()] = (email, item.get('employee_name'))
+    if not emails:
+        return {}
+    
+    try:
+        by_email = {e['email'].lower(): e for e in roster_cache.get(company_id) if e.get('email')}
+    except Exception as e:
+        logger.warning(f"⚠️ Roster cache unavailable: {e}")
+        by_email = {}
+    
+    missing = [original for key, (original, _) in emails.items() if key not in by_email]
+    if missing:
+        # Someone may have been added since the roster was cached
+        response = get_supabase().from_("employees").select(ROSTER_COLUMNS).eq("company_id", company_id).in_("email", missing).execute()
+        for employee in response.data or []:
+            by_email[employee['email'].lower()] = employee
+    
+    new_employees = [
+        {"email": original, "name": name or original.split('@')[0], "company_id": company_id}
+        for key, (original, name) in emails.items() if key not in by_email
+    ]
+    if new_employees:
+        logger.info(f"⚠️ Creating {len(new_employees)} employees not found in the roster")
+        created = []
+        try:
+            created = get_supabase().from_("employees").insert(new_employees).execute().data or []
+        except Exception as e:
+            # The unique index is on lower(email), which PostgREST's on_conflict can't
+            # target: a violation means a concurrent request created them first
+            logger.warning(f"⚠️ Employee insert failed, reloading the roster: {e}")
+            for employee in load_company_roster(company_id):
+                if employee.get('email'):
+                    by_email.setdefault(employee['email'].lower(), employee)
+        for employee in created:
+            by_email[employee['email'].lower()] = employee
+            logger.info(f"✅ Created new employee: {employee['name']} ({employee['id']})")
+        metrics.employees_created(len(created))
+        roster_cache.invalidate(company_id)
+    
+    return {key: by_email[key] for key in emails if key in by_email}
+
+def build_task_rows(action_items: List[dict], meeting_id: str, company_id: str, employees: dict):
+    """Return (rows to insert, rows with assigned_to for the response)."""
+    tasks_to_insert = []
+    saved_tasks = []
+    for item in action_items:
+        employee = employees.get((item.get('employee_email') or '').strip().lower())
+        employee_id = employee['id'] if employee else None
+        assigned_to = employee['name'] if employee else (item.get('employee_name') or item.get('employee_email'))
+        
+        # Prepare task data for database insert
+        task_data = {
+            "meeting_id": meeting_id,
+            "employee_id": employee_id,
+            "task_description": item.get('task', ''),
+            "due_date": item.get('deadline'),
+            "status": "pending",
+            "company_id": company_id
+        }
+        
+        # Keep assigned_to for response but don't insert it
+        task_data_with_assigned = task_data.copy()
+        task_data_with_assigned["assigned_to"] = assigned_to
+        
+        tasks_to_insert.append(task_data)
+        saved_tasks.append(task_data_with_assigned)
+    return tasks_to_insert, saved_tasks
+
 def save_tasks_to_database(action_items: List[dict], meeting_id: str, company_id: str) -> List[dict]:
     """Save action items as tasks to the database."""
     try:
         if not action_items:
             return []
         
-        tasks_to_insert = []
-        saved_tasks = []
+        try:
+            employees = resolve_employees(action_items, company_id)
+        except Exception as e:
+            logger.warning(f"❌ Employee lookup/create failed: {e}")
+            employees = {}
         
-        for item in action_items:
-            # Look up employee by email
-            employee_id = None
-            assigned_to = item.get('employee_name') or item.get('employee_email')
-            
-            if item.get('employee_email'):
-                try:
-                    # First try to find the employee
-                    emp_response = supabase.from_("employees").select("id, name").eq("email", item['employee_email']).eq("company_id", company_id).execute()
-                    if emp_response.data and len(emp_response.data) > 0:
-                        employee_id = emp_response.data[0]['id']
-                        assigned_to = emp_response.data[0]['name']
-                        logger.info(f"✅ Found employee: {assigned_to} ({employee_id})")
-                    else:
-                        # Create the employee if not found
-                        logger.info(f"⚠️ No employee found for {item.get('employee_email')}, creating new employee")
-                        new_employee = {
-                            "email": item['employee_email'],
-                            "name": item.get('employee_name', item['employee_email'].split('@')[0]),
-                            "company_id": company_id
-                        }
-                        create_response = supabase.from_("employees").insert(new_employee).execute()
-                        if create_response.data and len(create_response.data) > 0:
-                            employee_id = create_response.data[0]['id']
-                            assigned_to = create_response.data[0]['name']
-                            logger.info(f"✅ Created new employee: {assigned_to} ({employee_id})")
-                        else:
-                            logger.error(f"❌ Failed to create employee for {item.get('employee_email')}")
-                except Exception as e:
-                    logger.warning(f"❌ Employee lookup/create failed for {item.get('employee_email')}: {e}")
-            
-            # Prepare task data for database insert
-            task_data = {
-                "meeting_id": meeting_id,
-                "employee_id": employee_id,
-                "task_description": item.get('task', ''),
-                "due_date": item.get('deadline'),
-                "status": "pending",
-                "company_id": company_id
-            }
-            
-            # Keep assigned_to for response but don't insert it
-            task_data_with_assigned = task_data.copy()
-            task_data_with_assigned["assigned_to"] = assigned_to
-            
-            tasks_to_insert.append(task_data)
-            saved_tasks.append(task_data_with_assigned)
+        tasks_to_insert, saved_tasks = build_task_rows(action_items, meeting_id, company_id, employees)
         
         # Insert tasks
         if tasks_to_insert:
             logger.info(f"🔍 Inserting {len(tasks_to_insert)} tasks")
-            response = supabase.from_("tasks").insert(tasks_to_insert).execute()
+            with metrics.timed("task_insert"):
+                response = get_supabase().from_("tasks").insert(tasks_to_insert).execute()
             
             if response.data:
                 logger.info(f"✅ Successfully created {len(response.data)} tasks")
@@ -257,75 +493,320 @@ def save_tasks_to_database(action_items: List[dict], meeting_id: str, company_id
         logger.error(f"❌ Error saving tasks: {e}")
         return []
 
+def validate_assignments(result: dict, company_id: str) -> dict:
+    """
+    Point every action item at a real employee before anything is written.
+    An email that isn't on the roster is replaced by the employee whose name
+    fuzzily matches employee_name; only items with no match keep their email
+    (and so create a new employee).
+    """
+    roster = roster_cache.get(company_id)
+    by_email = {(e.get('email') or '').lower(): e for e in roster if e.get('email')}
+    name_index = get_name_index(company_id, roster)
+    validated = []
+    for item in result.get('action_items') or []:
+        item = dict(item)
+        email = (item.get('employee_email') or '').strip().lower()
+        if email and email in by_email:
+            validated.append(item)
+            continue
+        matched = name_index.match(item.get('employee_name') or '') if item.get('employee_name') else None
+        if matched:
+            employee, score = matched
+            logger.info(f"✅ Matched '{item.get('employee_name')}' <{item.get('employee_email')}> to {employee['name']} <{employee.get('email')}> (score {score})")
+            item['employee_name'] = employee['name']
+            item['employee_email'] = employee.get('email')
+        elif email:
+            logger.warning(f"⚠️ No roster match for '{item.get('employee_name')}' <{email}>")
+        validated.append(item)
+    return {**result, "action_items": validated}
+
+def meeting_row(transcript: str, result: dict, company_id: str, user_id: str, meta: dict) -> dict:
+    return {
+        "filename": meta.get('filename', 'uploaded_file'),
+        "transcript": transcript,
+        "summary": result.get('summary'),
+        "user_id": user_id,
+        "company_id": company_id
+    }
+
+# save_meeting_with_tasks.sql installs this; None until the first call tells us
+SAVE_MEETING_RPC = "save_meeting_with_tasks"
+_save_meeting_rpc_available = None
+
+def save_meeting_and_tasks(transcript: str, result: dict, company_id: str, user_id: str, meta: dict):
+    """
+    Persist the meeting and its tasks and return (meeting_id, saved_tasks).
+    One RPC round trip when the database function is installed, otherwise
+    a meeting write plus save_tasks_to_database. RPC errors other than the
+    function being missing are raised, not retried with separate writes.
+    """
+    global _save_meeting_rpc_available
+    action_items = result.get('action_items') or []
+    meeting = meeting_row(transcript, result, company_id, user_id, meta)
+    
+    if _save_meeting_rpc_available is not False:
+        try:
+            with metrics.timed("meeting_insert"):
+                response = get_supabase().rpc(SAVE_MEETING_RPC, {
+                    "p_company_id": company_id,
+                    "p_meeting_id": meta.get('meeting_id'),
+                    "p_meeting": meeting,
+                    "p_action_items": action_items,
+                }).execute()
+        except Exception as e:
+            # PGRST202: function not found in the schema cache. Anything else may
+            # have failed after the transaction committed, so writing again could
+            # duplicate the meeting and its tasks: surface it instead.
+            if 'PGRST202' not in str(e) and 'Could not find the function' not in str(e):
+                raise
+            logger.warning(f"⚠️ {SAVE_MEETING_RPC} RPC not installed, using separate writes")
+            _save_meeting_rpc_available = False
+        else:
+            _save_meeting_rpc_available = True
+            # Older installs of the function don't report it: assume anyone may have been created
+            created = response.data.get('employees_created')
+            metrics.employees_created(created or 0)
+            if created is None:
+                created = 1 if any(item.get('employee_email') for item in action_items) else 0
+            if created:
+                roster_cache.invalidate(company_id)
+            logger.info(f"✅ Saved meeting {response.data['meeting_id']} with {len(response.data['tasks'])} tasks")
+            return response.data['meeting_id'], response.data['tasks']
+    
+    # Save meeting to database if not already saved
+    meeting_id = None
+    if meta.get('meeting_id'):
+        meeting_id = meta['meeting_id']
+        # Update existing meeting with summary
+        try:
+            with metrics.timed("meeting_insert"):
+                get_supabase().from_("meetings").update({"summary": result.get('summary')}).eq("id", meeting_id).execute()
+            logger.info(f"✅ Updated meeting summary: {meeting_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update meeting summary: {e}")
+    else:
+        # Create meeting record
+        with metrics.timed("meeting_insert"):
+            meeting_response = get_supabase().from_("meetings").insert(meeting).execute()
+        if meeting_response.data:
+            meeting_id = meeting_response.data[0]['id']
+            logger.info(f"✅ Created meeting: {meeting_id}")
+    
+    # Save tasks
+    saved_tasks = []
+    if meeting_id and action_items:
+        saved_tasks = save_tasks_to_database(action_items, meeting_id, company_id)
+    return meeting_id, saved_tasks
+
+def save_meetings_bulk(entries: List[dict], company_id: str, user_id: str) -> List[tuple]:
+    """
+    Persist a batch: entries are {"transcript", "result", "meta"}; returns
+    (meeting_id, saved_tasks), or the exception that stopped it, per entry. One employee resolution, one meetings
+    insert and one tasks insert for the whole batch; on failure each entry is
+    saved on its own so one bad row doesn't sink the rest.
+    """
+    if not entries:
+        return []
+    try:
+        all_items = [item for entry in entries for item in entry["result"].get('action_items') or []]
+        try:
+            employees = resolve_employees(all_items, company_id)
+        except Exception as e:
+            logger.warning(f"❌ Employee lookup/create failed: {e}")
+            employees = {}
+        
+        meeting_ids = [entry["meta"].get('meeting_id') for entry in entries]
+        new = [i for i, meeting_id in enumerate(meeting_ids) if not meeting_id]
+        if new:
+            with metrics.timed("meeting_insert"):
+                response = get_supabase().from_("meetings").insert([
+                    meeting_row(entries[i]["transcript"], entries[i]["result"], company_id, user_id, entries[i]["meta"])
+                    for i in new
+                ]).execute()
+            # PostgREST returns inserted rows in the order they were sent
+            if len(response.data or []) != len(new):
+                raise RuntimeError(f"inserted {len(response.data or [])} of {len(new)} meetings")
+            for i, row in zip(new, response.data):
+                meeting_ids[i] = row['id']
+                # The meeting exists from here on: a retry must not create it again
+                entries[i]["meta"] = {**entries[i]["meta"], "meeting_id": row['id']}
+            logger.info(f"✅ Created {len(new)} meetings")
+        created = set(new)
+        for i, entry in enumerate(entries):
+            if i not in created:
+                get_supabase().from_("meetings").update({"summary": entry["result"].get('summary')}).eq("id", meeting_ids[i]).execute()
+        
+        tasks_to_insert, saved = [], []
+        for entry, meeting_id in zip(entries, meeting_ids):
+            rows, with_assigned = build_task_rows(entry["result"].get('action_items') or [], meeting_id, company_id, employees)
+            tasks_to_insert.extend(rows)
+            saved.append(with_assigned)
+        if tasks_to_insert:
+            with metrics.timed("task_insert"):
+                get_supabase().from_("tasks").insert(tasks_to_insert).execute()
+            logger.info(f"✅ Created {len(tasks_to_insert)} tasks for {len(entries)} meetings")
+        return list(zip(meeting_ids, saved))
+    except Exception as e:
+        logger.warning(f"⚠️ Bulk save failed, saving meetings one by one: {e}")
+        saved = []
+        for entry in entries:
+            try:
+                saved.append(save_meeting_and_tasks(entry["transcript"], entry["result"], company_id, user_id, entry["meta"]))
+            except Exception as item_error:
+                logger.error(f"❌ Error saving meeting: {item_error}")
+                saved.append(item_error)
+        return saved
+
 @app.route("/health", methods=["GET"])
 def health():
+    """Liveness: answers as soon as Flask is up, even while warming up."""
     return jsonify({"status": "healthy", "service": "crew-ai"})
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once the heavy dependencies and clients are loaded."""
+    status = warmup.status()
+    status["status"] = "ready" if status["ready"] else ("failed" if "error" in status else "warming_up")
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/cache/roster/invalidate", methods=["POST"])
+def invalidate_roster_cache():
+    """Called by the Node API whenever employees are added, edited or removed."""
+    data = request.get_json(silent=True) or {}
+    company_id = data.get('company_id')
+    dropped = roster_cache.invalidate(company_id)
+    logger.info(f"🧹 Roster cache invalidated for {company_id or 'all companies'}")
+    return jsonify({"success": True, "company_id": company_id, "dropped": dropped})
+
+@app.route("/cache/roster/stats", methods=["GET"])
+def roster_cache_stats():
+    return jsonify(roster_cache.stats())
+
+@app.route("/metrics/cache", methods=["GET"])
+def cache_metrics():
+    return jsonify({
+        "roster": roster_cache.stats(),
+        "results": result_cache.stats()
+    })
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus exposition: stage latencies, LLM tokens, parse failures, created employees, in-flight jobs."""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.route("/metrics/jobs", methods=["GET"])
+def job_metrics():
+    return jsonify({**job_queue.stats(), "admission": admission.stats()})
+
+def parse_transcript_request(data: dict) -> dict:
+    """Validate a /process-transcript body; raises ValueError with the message for a 400."""
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ValueError("body must be a JSON object")
+    meta = data.get('meta') or {}
+    if not isinstance(meta, dict):
+        raise ValueError("meta must be a JSON object")
+    if not isinstance(data.get('transcript') or '', str):
+        raise ValueError("transcript must be a string")
+    payload = {
+        "transcript": (data.get('transcript') or '').strip(),
+        "company_id": data.get('company_id'),
+        "user_id": data.get('user_id'),
+        "meta": meta,
+        "engine": data.get('engine') or meta.get('engine') or DEFAULT_ENGINE,
+    }
+    if not payload["transcript"]:
+        raise ValueError("transcript is required")
+    if not payload["company_id"]:
+        raise ValueError("company_id is required")
+    if payload["engine"] not in ENGINES:
+        raise ValueError(f"engine must be one of: {', '.join(ENGINES)}")
+    return payload
+
+def extract_meeting(payload: dict, on_event=no_event):
+    """Run the engine on a validated request and check its output; returns (result, processing_ms)."""
+    transcript, company_id, user_id = payload["transcript"], payload["company_id"], payload["user_id"]
+    meta, engine = payload["meta"], payload["engine"]
+    logger.info(f"🔍 Processing request - Company: {company_id}, User: {user_id}")
+    
+    # Process transcript
+    started = time.perf_counter()
+    result = process_meeting_transcript(transcript, company_id, user_id, meta, engine, on_event)
+    processing_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"⏱️ {result.get('engine', engine)} engine took {processing_ms} ms")
+    try:
+        result = validate_assignments(result, company_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not validate assignments: {e}")
+    # Spoken deadlines are resolved locally; the model's dates are only a fallback
+    action_items, changed = normalize_deadlines(result.get('action_items') or [], transcript, meeting_date(meta))
+    if changed:
+        logger.info(f"⚠️ Corrected {changed} deadlines")
+    # Emails are rendered from the final items, not written by the model
+    try:
+        emails = email_templates.render_emails(action_items, result.get('summary', ''), email_template_cache.get(company_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not render task emails: {e}")
+        emails = []
+    result = {**result, "action_items": action_items, "emails": emails}
+    on_event("summary_ready", {"summary": result.get('summary', ''), "engine": result.get('engine', engine),
+                               "processing_ms": processing_ms})
+    for index, item in enumerate(result.get('action_items', [])):
+        on_event("action_item", {"index": index, "item": item})
+    return result, processing_ms
+
+def transcript_response(result: dict, meeting_id, saved_tasks: List[dict], engine: str, processing_ms: float) -> dict:
+    return {
+        "meeting_summary": {
+            "summary": result.get('summary', ''),
+            "meeting_id": meeting_id
+        },
+        "action_items": result.get('action_items', []),
+        "saved_tasks": saved_tasks,
+        "emails": result.get('emails', []),  # Rendered from the company's email templates
+        "engine": result.get('engine', engine),
+        "processing_ms": processing_ms,
+        "success": True
+    }
+
+def run_transcript_job(payload: dict, on_event=no_event) -> dict:
+    """Process a validated request and save the meeting and tasks; returns the response body."""
+    with metrics.job(payload["company_id"], payload["engine"]):
+        result, processing_ms = extract_meeting(payload, on_event)
+        
+        # Save meeting and tasks
+        meeting_id, saved_tasks = save_meeting_and_tasks(payload["transcript"], result, payload["company_id"],
+                                                         payload["user_id"], payload["meta"])
+    on_event("tasks_saved", {"meeting_id": meeting_id, "saved_tasks": saved_tasks})
+    return transcript_response(result, meeting_id, saved_tasks, payload["engine"], processing_ms)
+
+admission = Admission()
+
+def run_queued_job(payload: dict) -> dict:
+    # Background jobs wait for a slot instead of being turned away
+    with admission.slot(block=True):
+        return run_transcript_job(payload)
+
+job_queue = JobQueue(run_queued_job)
+
 @app.route("/process-transcript", methods=["POST"])
 def process_transcript():
     """Main endpoint to process meeting transcripts."""
     try:
-        data = request.get_json()
-        
-        # Extract data
-        transcript = data.get('transcript', '').strip()
-        company_id = data.get('company_id')
-        user_id = data.get('user_id')
-        meta = data.get('meta', {})
-        
-        logger.info(f"🔍 Processing request - Company: {company_id}, User: {user_id}")
-        
-        if not transcript:
-            return jsonify({"error": "transcript is required"}), 400
-        
-        if not company_id:
-            return jsonify({"error": "company_id is required"}), 400
-        
-        # Process transcript
-        result = process_meeting_transcript(transcript, company_id, user_id, meta)
-        
-        # Save meeting to database if not already saved
-        meeting_id = None
-        if meta.get('meeting_id'):
-            meeting_id = meta['meeting_id']
-            # Update existing meeting with summary
-            try:
-                supabase.from_("meetings").update({"summary": result.get('summary')}).eq("id", meeting_id).execute()
-                logger.info(f"✅ Updated meeting summary: {meeting_id}")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to update meeting summary: {e}")
-        else:
-            # Create meeting record
-            meeting_data = {
-                "filename": meta.get('filename', 'uploaded_file'),
-                "transcript": transcript,
-                "summary": result.get('summary'),
-                "user_id": user_id,
-                "company_id": company_id
-            }
-            
-            meeting_response = supabase.from_("meetings").insert(meeting_data).execute()
-            if meeting_response.data:
-                meeting_id = meeting_response.data[0]['id']
-                logger.info(f"✅ Created meeting: {meeting_id}")
-        
-        # Save tasks
-        saved_tasks = []
-        if meeting_id and result.get('action_items'):
-            saved_tasks = save_tasks_to_database(result['action_items'], meeting_id, company_id)
-        
-        # Return response
-        return jsonify({
-            "meeting_summary": {
-                "summary": result.get('summary', ''),
-                "meeting_id": meeting_id
-            },
-            "action_items": result.get('action_items', []),
-            "saved_tasks": saved_tasks,
-            "emails": result.get('emails', []),  # Include emails from agent response
-            "success": True
-        })
-        
+        payload = parse_transcript_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        with admission.slot():
+            return jsonify(run_transcript_job(payload))
+    except Overloaded as e:
+        logger.warning(f"⚠️ Rejecting request for company {payload['company_id']}: {e}")
+        response = jsonify({"error": str(e), "retry_after": e.retry_after, "success": False})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
     except Exception as e:
         logger.error(f"❌ Error in process_transcript: {e}")
         return jsonify({
@@ -333,6 +814,209 @@ def process_transcript():
             "success": False
         }), 500
 
+def parse_batch_request(data: dict):
+    """
+    Validate a /process-transcripts body; returns (company_id, user_id, items)
+    where each item is a payload or the ValueError that rejected it. Raises
+    ValueError for problems with the batch as a whole.
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ValueError("body must be a JSON object")
+    company_id, user_id = data.get('company_id'), data.get('user_id')
+    transcripts = data.get('transcripts')
+    if not company_id:
+        raise ValueError("company_id is required")
+    if not isinstance(transcripts, list) or not transcripts:
+        raise ValueError("transcripts must be a non-empty list")
+    if len(transcripts) > BATCH_MAX_ITEMS:
+        raise ValueError(f"at most {BATCH_MAX_ITEMS} transcripts per batch")
+    
+    items = []
+    for entry in transcripts:
+        entry = {"transcript": entry} if isinstance(entry, str) else entry
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("each transcript must be a string or an object")
+            items.append(parse_transcript_request({
+                **entry,
+                "company_id": company_id,
+                "user_id": user_id,
+                "engine": entry.get('engine') or data.get('engine'),
+            }))
+        except ValueError as e:
+            items.append(e)
+    return company_id, user_id, items
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/process-transcript/stream", methods=["POST"])
+def process_transcript_stream():
+    """
+    Same work as /process-transcript, reported as Server-Sent Events:
+    roster_loaded, fast_path, cache_hit, llm_started, summary_ready,
+    action_item (one per item), tasks_saved, then done with the full
+    response body, or error.
+    """
+    try:
+        payload = parse_transcript_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        acquired_at = admission.acquire()
+    except Overloaded as e:
+        response = jsonify({"error": str(e), "retry_after": e.retry_after, "success": False})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
+    
+    events = queue.Queue()
+    
+    def work():
+        # Runs to the end even if the client disconnects, so the meeting is still saved
+        try:
+            events.put(("done", run_transcript_job(payload, lambda name, data=None: events.put((name, data or {})))))
+        except Exception as e:
+            logger.error(f"❌ Error in process_transcript_stream: {e}")
+            events.put(("error", {"error": str(e), "success": False}))
+        finally:
+            admission.release(acquired_at)
+    
+    threading.Thread(target=work, name="crew-sse", daemon=True).start()
+    
+    def stream():
+        yield sse("accepted", {"company_id": payload["company_id"], "engine": payload["engine"]})
+        while True:
+            try:
+                name, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield sse(name, data)
+            if name in ("done", "error"):
+                return
+    
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/process-transcripts", methods=["POST"])
+def process_transcripts():
+    """
+    Batch form of /process-transcript for bulk imports: one roster fetch,
+    up to CREW_BATCH_CONCURRENCY transcripts through the engines at once
+    (each holding an admission slot), then every meeting and task written
+    in bulk. Returns one result per transcript, in order; a failed item
+    has success false and an error and is not saved.
+    """
+    try:
+        company_id, user_id, items = parse_batch_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    started = time.perf_counter()
+    logger.info(f"🔍 Batch of {len(items)} transcripts for company {company_id}")
+    try:
+        # Warm the roster and name index once instead of racing on them per item
+        get_name_index(company_id, roster_cache.get(company_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not preload roster for batch: {e}")
+    
+    def extract(payload):
+        with admission.slot(block=True), metrics.job(company_id, payload["engine"]):
+            return extract_meeting(payload)
+    
+    results = [None] * len(items)
+    to_save = []
+    with ThreadPoolExecutor(max_workers=max(1, BATCH_CONCURRENCY), thread_name_prefix="crew-batch") as pool:
+        futures = {pool.submit(extract, item): index for index, item in enumerate(items) if isinstance(item, dict)}
+        for index, item in enumerate(items):
+            if isinstance(item, ValueError):
+                results[index] = {"index": index, "error": str(item), "success": False}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result, processing_ms = future.result()
+            except Exception as e:
+                logger.error(f"❌ Error in batch item {index}: {e}")
+                results[index] = {"index": index, "error": str(e), "success": False}
+                continue
+            if "error" in result:
+                results[index] = {"index": index, "error": result["error"], "success": False}
+                continue
+            to_save.append({"index": index, "transcript": items[index]["transcript"], "result": result,
+                            "meta": items[index]["meta"], "processing_ms": processing_ms})
+    
+    # Keep input order so meetings are created in the order they were sent
+    to_save.sort(key=lambda entry: entry["index"])
+    try:
+        with metrics.job(company_id, "batch"):
+            saved = save_meetings_bulk(to_save, company_id, user_id)
+    except Exception as e:
+        logger.error(f"❌ Error saving batch: {e}")
+        saved = [e] * len(to_save)
+    for entry, outcome in zip(to_save, saved):
+        index = entry["index"]
+        if isinstance(outcome, Exception):
+            results[index] = {"index": index, "error": str(outcome), "success": False}
+            continue
+        meeting_id, saved_tasks = outcome
+        response = transcript_response(entry["result"], meeting_id, saved_tasks, items[index]["engine"], entry["processing_ms"])
+        results[index] = {"index": index, **response}
+    
+    succeeded = sum(1 for result in results if result["success"])
+    logger.info(f"⏱️ Batch of {len(items)} transcripts took {time.perf_counter() - started:.1f}s ({succeeded} succeeded)")
+    return jsonify({
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "processing_ms": round((time.perf_counter() - started) * 1000, 1),
+        "success": succeeded == len(results)
+    })
+
+@app.route("/jobs/process-transcript", methods=["POST"])
+def submit_transcript_job():
+    """Queue a transcript and return at once; poll /jobs/<job_id> for the outcome."""
+    try:
+        payload = parse_transcript_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    job_id = job_queue.submit(payload)
+    logger.info(f"✅ Queued job {job_id} for company {payload['company_id']}")
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result"
+    }), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    job.pop("result")
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    """The /process-transcript response once the job is done; 202 while it is pending."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    if job["status"] == "succeeded":
+        return jsonify(job["result"])
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"], "success": False}), 500
+    return jsonify({"job_id": job_id, "status": job["status"]}), 202
+
+warmup.start()
+job_queue.start()
+
 if __name__ == "__main__":
+    # Development server; production runs gunicorn -c agents/gunicorn_conf.py crew:app
+    debug = os.getenv("CREW_DEBUG", "false").lower() in ("1", "on", "true", "yes")
     logger.info("🚀 Starting Crew AI service...")
-    app.run(host="0.0.0.0", port=5001, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=int(os.getenv("CREW_PORT", "5001")), debug=debug, threaded=True)
\ No newline at end of file
@@ -1,5 +1,4 @@
 import os
-import re
 import json
 import logging
 from datetime import date, datetime
@@ -10,6 +9,8 @@ from pydantic import BaseModel
 from crewai import Agent, Task, Crew, LLM
 from crewai_tools import tool
 from supabase import create_client
+import json_repair
+import email_templates
 
 dotenv.load_dotenv()
 logging.basicConfig(level=logging.INFO)
@@ -94,22 +95,6 @@ Do NOT include any explanation, markdown, or code fences — return only raw JSO
     tools=[get_company_employees]
 )
 
-email_agent = Agent(
-    role="Email Composer Agent",
-    goal="Given a meeting summary and action items, compose a short friendly email draft for each action item.",
-    backstory="""
-You receive a JSON object like:
-{"meeting_summary": "...", "action_items": [{"employee_name": "...", "employee_email": "...", "task": "...", "deadline": "YYYY-MM-DD"}]}
-For each action_item return an object with: employee_email, subject, body.
-Return a JSON array only (no extra text). Example:
-[
-  {"employee_email":"a@x.com","subject":"Task: Finish X","body":"Hi..."}
-]
-Do NOT include any markdown or explanation.
-""",
-    llm=llm
-)
-
 def safe_parse_json_from_result(result) -> Optional[dict]:
     try:
         if hasattr(result, "json_dict") and result.json_dict:
@@ -128,24 +113,8 @@ def safe_parse_json_from_result(result) -> Optional[dict]:
             joined = str(result)
         except Exception:
             joined = ""
-    try:
-        return json.loads(joined)
-    except Exception:
-        pass
-    patterns = [r"(\{(?:.|\n)*\})", r"(\[(?:.|\n)*\])"]
-    for pat in patterns:
-        m = re.search(pat, joined, re.DOTALL)
-        if m:
-            s = m.group(1)
-            try:
-                return json.loads(s)
-            except Exception:
-                try:
-                    s_fixed = s.replace("“", '"').replace("”", '"').replace("’", "'")
-                    return json.loads(s_fixed)
-                except Exception:
-                    continue
-    return None
+    # Balanced-bracket scan with local repair (fences, trailing commas, truncation)
+    return json_repair.extract_json(joined)
 
 app = Flask(__name__)
 
@@ -354,55 +323,13 @@ No markdown, no explanation — only JSON.
         errors.append({"tasks_exception": str(e)})
 
     try:
-        task_description = {
-            "meeting_summary": parsed_summary.get("summary") if isinstance(parsed_summary, dict) else parsed_summary,
-            "action_items": normalized_items
-        }
-        email_prompt = f"""
-You are given the following meeting summary and action items JSON:
-{json.dumps(task_description, indent=2)}
-
-For each action item, compose a short, professional email draft.
-Each email should contain the task, deadline (if any), and one sentence of context from the meeting summary.
-Return your response as a JSON array only with objects:
-[{{"employee_email":"", "subject":"", "body":""}}]
-Do NOT include any other text or markdown.
-"""
-        email_task = Task(
-            description=email_prompt,
-            expected_output="JSON array as specified",
-            agent=email_agent
-        )
-        email_crew = Crew(agents=[email_agent], tasks=[email_task], verbose=False)
-        email_result = email_crew.kickoff()
-        parsed_emails = safe_parse_json_from_result(email_result)
-        if not parsed_emails:
-            logger.warning("Email agent produced non-JSON output; capturing raw output for debugging")
-            raw_text = ""
-            for attr in ("output", "output_text", "raw_output", "text"):
-                if hasattr(email_result, attr):
-                    raw_text = getattr(email_result, attr) or raw_text
-            m = re.search(r"(\[(?:.|\n)*\])", raw_text, re.DOTALL)
-            if m:
-                try:
-                    parsed_emails = json.loads(m.group(1))
-                except Exception:
-                    parsed_emails = []
-            else:
-                parsed_emails = []
-        if isinstance(parsed_emails, list):
-            for e in parsed_emails:
-                if isinstance(e, dict) and e.get("employee_email"):
-                    emails.append({
-                        "employee_email": e.get("employee_email"),
-                        "subject": e.get("subject") or "",
-                        "body": e.get("body") or ""
-                    })
-        else:
-            emails = []
+        # Rendered from templates; no second agent run for boilerplate text
+        summary_text = parsed_summary.get("summary") if isinstance(parsed_summary, dict) else parsed_summary
+        emails = [{"employee_email": e["employee_email"], "subject": e["subject"], "body": e["body"]}
+                  for e in email_templates.render_emails(normalized_items, summary_text or "")]
     except Exception as e:
-        logger.exception("Email agent failed")
-        errors.append({"email_agent_exception": str(e)})
+        logger.exception("Email rendering failed")
+        errors.append({"email_render_exception": str(e)})
         emails = []
 
     response = {
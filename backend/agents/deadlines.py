@@ -0,0 +1,157 @@
+"""
+Deterministic resolution of spoken deadlines.
+
+Phrases like "within 20th October", "by November 3rd" or "the coming
+Saturday" are anchored to the meeting date and turned into ISO dates.
+Resolution is memoized per (phrase, anchor date), since the same few
+phrases come up in meeting after meeting.
+
+normalize_deadlines() checks the deadlines the LLM returned. For each
+action item it finds the transcript sentence the task came from. If that
+sentence has exactly one deadline phrase tied to the task ("by Friday",
+"within 20th October"), the resolved date wins. Otherwise a valid model
+date is kept, and only a missing or invalid one is replaced by the first
+date the sentence mentions.
+"""
+import re
+import logging
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+WEEKDAYS = {name.lower(): number for number, name in enumerate(calendar.day_name)}
+# A day-month without a year this far in the past is still this year (overdue), not next year
+PAST_GRACE_DAYS = 7
+
+_MONTH = r"(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(?P<year>\d{4}))?"
+_WEEKDAY = r"(?P<weekday>" + "|".join(WEEKDAYS) + r")"
+
+# Preposition + date expression; the whole match is cut out of the task text
+DEADLINE_RE = re.compile(
+    r"(?:\s*,?\s*\b(?P<prep>by|within|before|until|till|on|due(?:\s+on|\s+by)?|no later than)\s+)?"
+    r"(?:the\s+)?(?P<expr>"
+    r"(?P<iso>\d{4}-\d{2}-\d{2})"
+    r"|" + _DAY + r"\s+(?:of\s+)?" + _MONTH + _YEAR +
+    r"|" + _MONTH.replace("month", "month2") + r"\s+(?:the\s+)?" + _DAY.replace("day", "day2") + _YEAR.replace("year", "year2") +
+    r"|(?P<relative>today|tonight|tomorrow|end of (?:the |this )?(?:day|week|month)|next week)"
+    r"|(?:(?P<which>next|this|coming)\s+)?" + _WEEKDAY +
+    r"|in\s+(?P<count>\d+|a|one|two|three)\s+(?P<unit>days?|weeks?)"
+    r")\b",
+    re.IGNORECASE,
+)
+# Prepositions that make a date the task's deadline ("on Monday you said..." is just a date)
+DEADLINE_PREPOSITIONS = ("by", "within", "before", "until", "till", "due", "no later than")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+STOPWORDS = {"a", "an", "the", "to", "and", "or", "of", "for", "on", "in", "by", "with", "up", "be", "is",
+             "you", "i", "need", "please", "done", "complete", "finish", "within", "before", "until"}
+
+
+def _resolve(groups, anchor):
+    try:
+        if groups["iso"]:
+            return date.fromisoformat(groups["iso"]).isoformat()
+        month, day, year = groups["month"] or groups["month2"], groups["day"] or groups["day2"], groups["year"] or groups["year2"]
+        if month:
+            resolved = date(int(year or anchor.year), MONTHS[month.lower().rstrip(".")], int(day))
+            if not year and resolved < anchor - timedelta(days=PAST_GRACE_DAYS):
+                # "November 3rd" said in December means next year
+                resolved = resolved.replace(year=resolved.year + 1)
+            return resolved.isoformat()
+    except ValueError:
+        return None
+
+    relative = (groups["relative"] or "").lower()
+    if relative in ("today", "tonight", "end of day", "end of the day", "end of this day"):
+        return anchor.isoformat()
+    if relative == "tomorrow":
+        return (anchor + timedelta(days=1)).isoformat()
+    if relative == "next week":
+        return (anchor + timedelta(days=7)).isoformat()
+    if relative.endswith("week"):
+        return (anchor + timedelta(days=(4 - anchor.weekday()) % 7)).isoformat()
+    if relative.endswith("month"):
+        return anchor.replace(day=calendar.monthrange(anchor.year, anchor.month)[1]).isoformat()
+
+    if groups["weekday"]:
+        ahead = (WEEKDAYS[groups["weekday"].lower()] - anchor.weekday()) % 7 or 7
+        if (groups["which"] or "").lower() == "next" and ahead < 7:
+            ahead += 7
+        return (anchor + timedelta(days=ahead)).isoformat()
+    if groups["unit"]:
+        count = {"a": 1, "one": 1, "two": 2, "three": 3}.get(groups["count"].lower()) or int(groups["count"])
+        return (anchor + timedelta(days=count * (7 if groups["unit"].lower().startswith("week") else 1))).isoformat()
+    return None
+
+
+@lru_cache(maxsize=4096)
+def resolve_phrase(phrase, anchor):
+    """ISO date for a deadline phrase said on anchor (a date), or None."""
+    match = DEADLINE_RE.search(phrase)
+    return _resolve(match.groupdict(), anchor) if match else None
+
+
+def _phrase_key(match):
+    return " ".join(match.group("expr").lower().split())
+
+
+def find_deadline(text, anchor=None):
+    """Return (deadline ISO date or None, text with the deadline phrase removed, found a date phrase)."""
+    anchor = anchor or date.today()
+    match = DEADLINE_RE.search(text)
+    if not match:
+        return None, text, False
+    remaining = (text[:match.start()] + text[match.end():]).strip()
+    return resolve_phrase(_phrase_key(match), anchor), remaining, True
+
+
+def _task_deadline(sentence, anchor):
+    """The resolved date when sentence has exactly one by/within/before... phrase, else None."""
+    tied = [m for m in DEADLINE_RE.finditer(sentence)
+            if m.group("prep") and m.group("prep").lower().startswith(DEADLINE_PREPOSITIONS)]
+    return resolve_phrase(_phrase_key(tied[0]), anchor) if len(tied) == 1 else None
+
+
+def _words(text):
+    return {w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in STOPWORDS}
+
+
+def _source_sentence(task, sentences):
+    """The sentence a task was most likely taken from, or None."""
+    task_words = _words(task)
+    if not task_words:
+        return None
+    best, best_overlap = None, 0.0
+    for sentence, words in sentences:
+        overlap = len(task_words & words) / len(task_words)
+        if overlap > best_overlap:
+            best, best_overlap = sentence, overlap
+    return best if best_overlap >= 0.5 else None
+
+
+def normalize_deadlines(action_items, transcript, anchor=None):
+    """Return (action items with checked deadlines, number of deadlines changed)."""
+    anchor = anchor or date.today()
+    sentences = [(s, _words(s)) for s in SENTENCE_SPLIT.split(transcript or "") if s.strip()]
+    checked, changed = [], 0
+    for item in action_items:
+        item = dict(item)
+        given = item.get("deadline")
+        sentence = _source_sentence(item.get("task"), sentences)
+        resolved = _task_deadline(sentence, anchor) if sentence else None
+        if resolved is None:
+            # No unambiguous deadline in the transcript: keep the model's date if it is one
+            resolved = resolve_phrase(" ".join(str(given).lower().split()), anchor) if given else None
+        if resolved is None and sentence:
+            resolved = find_deadline(sentence, anchor)[0]
+        if resolved != given:
+            logger.info(f"⚠️ Deadline for '{item.get('task')}': {given!r} -> {resolved!r}")
+            changed += 1
+        item["deadline"] = resolved
+        checked.append(item)
+    return checked, changed
@@ -0,0 +1,73 @@
+"""
+Task assignment emails rendered from templates instead of by the LLM.
+
+Asking the model for a subject and body per action item roughly doubled
+the output tokens, and the text was boilerplate anyway. Each email is
+now filled in from the final action item (after assignment and deadline
+checks) and the meeting summary.
+
+Templates use string.Template placeholders:
+
+    $employee_name  $first_name  $employee_email  $task
+    $deadline       $due ("" or " by <deadline>")  $meeting_summary
+
+A company can override the subject and/or body (email_templates.sql).
+Unknown placeholders are left as written rather than failing the request.
+Compiled templates are memoized on their text, so rendering a batch is
+one substitution per email.
+"""
+from string import Template
+from functools import lru_cache
+
+DEFAULT_SUBJECT = "Task Assignment: $task"
+DEFAULT_BODY = """Hi $first_name,
+
+You have been assigned a new task from today's meeting:
+
+$task$due
+
+Meeting summary:
+$meeting_summary
+
+Thank you."""
+
+
+@lru_cache(maxsize=256)
+def compile_templates(subject, body):
+    return Template(subject), Template(body)
+
+
+def templates_for(overrides=None):
+    """(subject, body) Templates with a company's overrides applied."""
+    overrides = overrides or {}
+    return compile_templates(overrides.get("subject") or DEFAULT_SUBJECT, overrides.get("body") or DEFAULT_BODY)
+
+
+def email_fields(item, summary):
+    name = item.get("employee_name") or (item.get("employee_email") or "").split("@")[0]
+    deadline = item.get("deadline") or ""
+    return {
+        "employee_name": name,
+        "first_name": name.split()[0] if name.split() else name,
+        "employee_email": item.get("employee_email") or "",
+        "task": item.get("task") or "",
+        "deadline": deadline,
+        "due": f" by {deadline}" if deadline else "",
+        "meeting_summary": summary or "",
+    }
+
+
+def render_email(item, summary="", overrides=None):
+    subject, body = templates_for(overrides)
+    fields = email_fields(item, summary)
+    return {
+        "employee_name": fields["employee_name"],
+        "employee_email": fields["employee_email"],
+        "subject": subject.safe_substitute(fields),
+        "body": body.safe_substitute(fields),
+    }
+
+
+def render_emails(action_items, summary="", overrides=None):
+    """One email per action item that has an address."""
+    return [render_email(item, summary, overrides) for item in action_items if item.get("employee_email")]
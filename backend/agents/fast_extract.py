@@ -0,0 +1,205 @@
+"""
+Rule-based action-item extraction for short, plainly phrased transcripts.
+
+Most recordings read like "Nisha, I need you to finish the Udemy course by
+November 3rd." Those don't need an agent run: a roster-name match, a few
+imperative patterns and a deadline parser produce the same summary and
+action_items the LLM would, in a few milliseconds.
+
+extract() returns that structure plus a confidence score. Every item is
+scored on whether it had a clear request, a roster name and a parseable
+deadline, and the transcript is marked down for every non-trivial
+sentence the patterns couldn't explain: questions, states like "will be
+on leave" and plain discussion may all hide tasks only the LLM would
+find. crew.py only trusts the result at FAST_PATH_MIN_CONFIDENCE or above
+and hands everything else to the LLM.
+"""
+import os
+import re
+from datetime import date
+
+from deadlines import find_deadline
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH", "on").lower() not in ("0", "off", "false", "no")
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+# Longer transcripts are meetings, not task lists; leave them to the LLM
+FAST_PATH_MAX_CHARS = int(os.getenv("FAST_PATH_MAX_CHARS", "4000"))
+
+# Requests addressed to "you"; the task is whatever follows
+REQUEST_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"\bi (?:need|needed|want|would like|'d like) you to (?P<task>.+)",
+    r"\bi expect you to (?P<task>.+)",
+    r"\b(?:can|could|would) you (?:please )?(?P<task>.+)",
+    r"\byou(?:'ll| will| need to| should| have to| must|'re going to| are going to) (?P<task>.+)",
+    r"\bmake sure (?:you |to )?(?P<task>.+)",
+    r"\b(?:please|kindly) (?P<task>.+)",
+)]
+# Weaker: speech-to-text often drops the "you" ("Mark, I needed to ...")
+WEAK_REQUEST_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"\bi need(?:ed)? to (?P<task>.+)",
+)]
+# Third person: "<name> will ...", "<name> needs to ..."
+THIRD_PERSON = r"\b{name}\b(?:'ll|\s+(?:will|is going to|needs to|should|has to|must))\s+(?P<task>.+)"
+
+# Not requests: "can you believe ...", "would you imagine ..."
+NON_REQUEST_VERBS = re.compile(r"^(?:believe|imagine|guess|think|remember|recall|hear)\b", re.IGNORECASE)
+# States rather than actions: "Nisha will be on leave", "you'll stay home"
+STATE_VERBS = re.compile(r"^(?:be|stay|remain)\b(?!\s+(?:done|finished)\s+with\b)", re.IGNORECASE)
+FILLER = re.compile(r"^(?:okay|ok|so|and|also|finally|alright|right)\b[,\s]*", re.IGNORECASE)
+
+TASK_REWRITES = [
+    (re.compile(r"^(?:be|get) done with\s+", re.IGNORECASE), "finish "),
+    (re.compile(r"^(?:be|get) finished with\s+", re.IGNORECASE), "finish "),
+]
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _clean_task(task):
+    task = task.strip().strip(",;:-").strip()
+    task = re.sub(r"\s+", " ", task).rstrip(".!?, ")
+    for pattern, replacement in TASK_REWRITES:
+        task = pattern.sub(replacement, task)
+    return task[:1].upper() + task[1:]
+
+
+class _Roster:
+    """Roster names compiled into one pattern, with first names when unambiguous."""
+
+    def __init__(self, employees):
+        self.by_alias = {}
+        first_names = {}
+        for employee in employees:
+            name = (employee.get("name") or "").strip()
+            if not name:
+                continue
+            self.by_alias[name.lower()] = employee
+            first = name.split()[0].lower()
+            first_names.setdefault(first, []).append(employee)
+        for first, matches in first_names.items():
+            if len(matches) == 1:
+                self.by_alias.setdefault(first, matches[0])
+        aliases = sorted(self.by_alias, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, aliases)) + r")\b", re.IGNORECASE) if aliases else None
+
+    def mentions(self, sentence):
+        if not self.pattern:
+            return []
+        return [(m, self.by_alias[m.group(1).lower()]) for m in self.pattern.finditer(sentence)]
+
+
+def _strip_filler(sentence):
+    return FILLER.sub("", sentence)
+
+
+def _is_trivial(sentence):
+    """Greetings and one-word lines like "Okay, Nisha." that carry nothing to explain."""
+    return len(_strip_filler(sentence).split()) <= 3
+
+
+def _is_action(task):
+    task = task.strip()
+    return bool(task) and not NON_REQUEST_VERBS.match(task) and not STATE_VERBS.match(task)
+
+
+def _find_request(sentence, employee):
+    """Return (task text, score) for the request in sentence, or (None, 0)."""
+    # Questions are conversation, or at best requests worth an LLM read
+    if sentence.rstrip().endswith("?"):
+        return None, 0
+    for pattern in REQUEST_PATTERNS:
+        match = pattern.search(sentence)
+        if match and _is_action(match.group("task")):
+            return match.group("task"), 0.5
+    if employee:
+        names = "|".join(re.escape(alias) for alias in (employee["name"], employee["name"].split()[0]))
+        match = re.search(THIRD_PERSON.format(name=f"(?:{names})"), sentence, re.IGNORECASE)
+        if match and _is_action(match.group("task")):
+            return match.group("task"), 0.5
+    for pattern in WEAK_REQUEST_PATTERNS:
+        match = pattern.search(sentence)
+        if match and _is_action(match.group("task")):
+            return match.group("task"), 0.4
+    return None, 0
+
+
+def extract(transcript, employees, today=None, name_index=None):
+    """
+    Pull action items out of transcript without an LLM. With a
+    name_index.NameIndex, names the roster doesn't spell exactly are
+    matched fuzzily (scored a little lower).
+
+    Returns {"summary", "action_items", "confidence", "engine"} with
+    action_items shaped like schemas.ActionItem.
+    """
+    today = today or date.today()
+    result = {"summary": "", "action_items": [], "confidence": 0.0, "engine": "fast"}
+    if not transcript or len(transcript) > FAST_PATH_MAX_CHARS:
+        return result
+
+    roster = _Roster(employees or [])
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(transcript) if s.strip()]
+    scores = []
+    notes = []
+    unexplained = 0
+    addressee = None  # "Okay, Nisha." followed by the request in the next sentence
+
+    for sentence in sentences:
+        # (employee, weight): exact roster names count more than fuzzy matches
+        mentions = [(employee, 0.3) for _, employee in roster.mentions(sentence)]
+        if not mentions and name_index is not None:
+            mentions = [(employee, 0.2) for employee, _, _ in name_index.find_mentions(sentence)]
+        employee, weight = mentions[0] if mentions else (addressee or (None, 0.0))
+        task, score = _find_request(sentence, employee)
+        if task is None:
+            # Anything said that isn't an action item may hold one the patterns missed
+            if addressee or not _is_trivial(sentence):
+                unexplained += 1
+            addressee = mentions[0] if len(mentions) == 1 else None
+            if not mentions:
+                notes.append(sentence)
+            continue
+
+        addressee = None
+        if len(mentions) > 1:
+            # Two people in one request: can't tell who it is for
+            score -= 0.3
+        deadline, task, had_date = find_deadline(task, today)
+        score += weight if employee else 0.0
+        score += 0.2 if deadline or not had_date else 0.0
+        task = _clean_task(task)
+        if not task:
+            continue
+
+        scores.append(score)
+        result["action_items"].append({
+            "employee_name": employee["name"] if employee else None,
+            "employee_email": employee.get("email") if employee else None,
+            "task": task,
+            "deadline": deadline,
+        })
+    if addressee:
+        unexplained += 1
+
+    items = result["action_items"]
+    if items:
+        result["confidence"] = round(max(0.0, min(scores) - 0.15 * unexplained), 2)
+    result["summary"] = build_summary(items, notes)
+    return result
+
+
+def build_summary(action_items, notes):
+    parts = []
+    if action_items:
+        assignments = []
+        for item in action_items:
+            who = item["employee_name"] or "Unassigned"
+            due = f" by {item['deadline']}" if item["deadline"] else ""
+            assignments.append(f"{who}: {item['task'][:1].lower() + item['task'][1:]}{due}")
+        parts.append("Action items - " + "; ".join(assignments) + ".")
+    # Strip filler openers like "Okay," / "Finally," from the remaining lines
+    notes = [_strip_filler(note) for note in notes if not _is_trivial(note)]
+    notes = [note[:1].upper() + note[1:] for note in notes]
+    if notes:
+        parts.append("Notes: " + " ".join(note if note.endswith((".", "!", "?")) else note + "." for note in notes))
+    return " ".join(parts)
+
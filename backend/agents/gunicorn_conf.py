@@ -0,0 +1,42 @@
+"""
+Production server settings for the crew service.
+
+    gunicorn -c agents/gunicorn_conf.py crew:app
+
+Each worker process handles CREW_THREADS requests at once and runs at most
+CREW_MAX_CONCURRENT_JOBS transcripts (see admission.py); the rest are
+answered with 429. Timeouts are long because one LLM run can take minutes.
+Workers write Prometheus metrics to PROMETHEUS_MULTIPROC_DIR so /metrics
+reports the whole service, not just the worker that answered. A roster
+invalidation from Node reaches one worker; the others pick it up from
+the shared stamps in crew_invalidations.sqlite3 (see roster_cache.py).
+"""
+import os
+import shutil
+import tempfile
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"0.0.0.0:{os.getenv('CREW_PORT', '5001')}"
+workers = int(os.getenv("CREW_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("CREW_THREADS", "8"))
+timeout = int(os.getenv("CREW_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+loglevel = os.getenv("CREW_LOG_LEVEL", "info")
+
+# Must be set before the workers import prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "crew_metrics"))
+
+
+def on_starting(server):
+    # Values left over from a previous run would be summed in
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,180 @@
+"""
+Persistent background job queue for transcript processing.
+
+POST /jobs/process-transcript stores the request in a SQLite table and
+returns at once. A fixed pool of worker threads claims queued jobs, runs
+them and stores the result or the error, which the status endpoints read.
+
+Claiming is a single UPDATE on a queued row, so several service processes
+can share one queue file. Each process writes a heartbeat; running jobs
+whose process stopped beating (a restart or a crash) go back in the queue.
+Finished jobs are deleted after JOB_RETENTION_HOURS.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crew_jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+POLL_SECONDS = 2.0
+HEARTBEAT_SECONDS = 10.0
+# A process that missed this many seconds of heartbeats is considered gone
+STALE_SECONDS = 45.0
+
+
+class JobQueue:
+    def __init__(self, handler, path=JOB_QUEUE_PATH, workers=JOB_WORKERS):
+        """handler(payload dict) -> result dict; an exception fails the job."""
+        self.handler = handler
+        self.path = path
+        self.workers = workers
+        self._wake = threading.Event()
+        self._started = False
+        self._local = threading.local()
+        self.owner = uuid.uuid4().hex
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections are not thread-safe
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._create_schema(db)
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _create_schema(db):
+        # Once per connection, not per call: status polls shouldn't run DDL on the shared file
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL,"
+            " result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, owner TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)")
+        db.execute("CREATE TABLE IF NOT EXISTS owners (owner TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._heartbeat()
+        threading.Thread(target=self._keep_alive, name="crew-job-heartbeat", daemon=True).start()
+        for index in range(self.workers):
+            threading.Thread(target=self._work, name=f"crew-job-{index}", daemon=True).start()
+
+    def submit(self, payload):
+        self.start()
+        job_id = uuid.uuid4().hex
+        self._db().execute("INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                           (job_id, json.dumps(payload), time.time()))
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+        if row["status"] == "queued":
+            job["position"] = self._db().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (row["created_at"],)
+            ).fetchone()[0]
+        return job
+
+    def stats(self):
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"workers": self.workers, **{s: counts.get(s, 0) for s in ("queued", "running", "succeeded", "failed")}}
+
+    def _heartbeat(self):
+        now = time.time()
+        db = self._db()
+        db.execute("INSERT OR REPLACE INTO owners (owner, heartbeat) VALUES (?, ?)", (self.owner, now))
+        db.execute("DELETE FROM owners WHERE heartbeat < ?", (now - STALE_SECONDS,))
+        # Jobs whose process went away (restart or crash) run again
+        requeued = db.execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL WHERE status = 'running'"
+            " AND (owner IS NULL OR owner NOT IN (SELECT owner FROM owners))"
+        ).rowcount
+        if requeued:
+            logger.info(f"🔍 Re-queued {requeued} jobs from a stopped process")
+
+    def _keep_alive(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.error(f"❌ Job queue heartbeat failed: {e}")
+
+    def _claim(self):
+        db = self._db()
+        while True:
+            row = db.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                return None
+            # Another worker or process may claim the same row first
+            claimed = db.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, attempts = attempts + 1"
+                " WHERE id = ? AND status = 'queued'", (self.owner, time.time(), row["id"])
+            ).rowcount
+            if claimed:
+                return db.execute("SELECT id, payload, attempts FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._db().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_HOURS * 3600
+        self._db().execute("DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?", (cutoff,))
+
+    def _work(self):
+        last_prune = 0.0
+        while True:
+            try:
+                job = self._claim()
+                if job is None:
+                    if time.time() - last_prune > 3600:
+                        self._prune()
+                        last_prune = time.time()
+                    self._wake.wait(POLL_SECONDS)
+                    self._wake.clear()
+                    continue
+            except Exception as e:
+                logger.error(f"❌ Job queue error: {e}")
+                time.sleep(POLL_SECONDS)
+                continue
+
+            job_id = job["id"]
+            started = time.perf_counter()
+            logger.info(f"🔍 Running job {job_id} (attempt {job['attempts']})")
+            try:
+                result = self.handler(json.loads(job["payload"]))
+            except Exception as e:
+                # Not retried: the meeting may already be saved
+                logger.error(f"❌ Job {job_id} failed: {e}")
+                self._finish(job_id, "failed", error=str(e))
+                continue
+            self._finish(job_id, "succeeded", result=result)
+            logger.info(f"✅ Job {job_id} finished in {time.perf_counter() - started:.1f}s")
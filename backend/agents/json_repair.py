@@ -0,0 +1,239 @@
+"""
+Recovering MeetingSummary JSON from whatever the model actually wrote.
+
+Models wrap JSON in prose and code fences, leave trailing commas, write
+Python's True/None, or stop mid-array when they hit the output limit. A
+greedy regex from the first "{" to the last "}" gives up on all of these,
+and the whole crew had to run again.
+
+extract_json() scans the text once with a bracket stack that knows about
+strings, and collects every top-level object or array. Each candidate is
+parsed as-is first. If that fails it is repaired locally: trailing commas
+are dropped, literals fixed and smart quotes straightened. A truncated
+candidate is closed where it stopped, or cut back to the last complete
+element and closed. parse_meeting_summary() validates the result against
+schemas.MeetingSummary item by item, keeps every valid action item and
+reports which top-level fields are missing. Those fields can be requested
+with one short reask_missing() call instead of a full re-run.
+"""
+import re
+import ast
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FENCE_RE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'"})
+LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _candidates(text):
+    """Every top-level {...} / [...] in text as (fragment, complete), in one pass."""
+    found = []
+    stack = []
+    start = None
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if start is None:
+            if ch in CLOSERS:
+                start, stack = i, [ch]
+            continue
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            stack.append(ch)
+        elif ch in "}]":
+            if CLOSERS[stack[-1]] != ch:
+                # Mismatched bracket: not JSON, look again after this opener
+                start, stack = None, []
+                continue
+            stack.pop()
+            if not stack:
+                found.append((text[start:i + 1], True))
+                start = None
+    if start is not None:
+        found.append((text[start:], False))
+    return found
+
+
+def _repair(fragment):
+    """Yield repaired versions of fragment, most faithful first."""
+    out = []
+    stack = []
+    safe_points = []  # (length of out, open brackets) where everything before is complete
+    in_string = escape = False
+    i = 0
+    while i < len(fragment):
+        ch = fragment[i]
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            i += 1
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            out.append(ch)
+            stack.append(ch)
+            safe_points.append((len(out), tuple(stack)))
+            i += 1
+            continue
+        elif ch in "}]":
+            # Trailing comma before a closing bracket
+            while out and out[-1] in " \t\r\n,":
+                out.pop()
+            out.append(ch)
+            if stack:
+                stack.pop()
+            # A finished element: cutting back here keeps all of it
+            safe_points.append((len(out), tuple(stack)))
+            i += 1
+            continue
+        elif ch == ",":
+            safe_points.append((len(out), tuple(stack)))
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z]+", fragment[i:]).group(0)
+            out.append(LITERALS.get(word, word))
+            i += len(word)
+            continue
+        out.append(ch)
+        i += 1
+
+    text = "".join(out)
+    if not stack and not in_string:
+        yield text
+        return
+    # Truncated. A half-written top-level string (the summary) is worth
+    # keeping; deeper down, a half-written task is not, so cut back to the
+    # last complete element first.
+    closed_here = text + ('"' if in_string else "") + "".join(CLOSERS[b] for b in reversed(stack))
+    if len(stack) == 1:
+        yield closed_here
+    for length, open_brackets in reversed(safe_points):
+        yield "".join(out[:length]).rstrip(" \t\r\n,") + "".join(CLOSERS[b] for b in reversed(open_brackets))
+    yield closed_here
+
+
+def _loads(fragment):
+    try:
+        return json.loads(fragment), False
+    except ValueError:
+        pass
+    for variant in (fragment, fragment.translate(SMART_QUOTES)):
+        for repaired in _repair(variant):
+            try:
+                return json.loads(repaired), True
+            except ValueError:
+                continue
+    # Python dict syntax ('single quotes')
+    try:
+        value = ast.literal_eval(fragment)
+        return (value, True) if isinstance(value, (dict, list)) else (None, False)
+    except (ValueError, SyntaxError):
+        return None, False
+
+
+def extract_json(text, prefer_keys=("summary", "action_items")):
+    """First JSON value in text, preferring objects that have one of prefer_keys; None if nothing parses."""
+    if not isinstance(text, str):
+        text = str(text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Look inside code fences first, then the whole text
+    sources = [m.group(1) for m in FENCE_RE.finditer(text)] + [text]
+    fallback = None
+    for source in sources:
+        for fragment, complete in _candidates(source):
+            value, repaired = _loads(fragment)
+            if value is None:
+                continue
+            if repaired:
+                logger.info(f"⚠️ Repaired {'truncated ' if not complete else ''}JSON from model output")
+            if isinstance(value, dict) and any(key in value for key in prefer_keys):
+                return value
+            if fallback is None:
+                fallback = value
+    return fallback
+
+
+def raw_text(result):
+    """Model output as text, from a CrewOutput or anything str()-able."""
+    for attr in ("raw", "output", "output_text", "raw_output", "text", "response"):
+        value = getattr(result, attr, None)
+        if value:
+            return value if isinstance(value, str) else str(value)
+    return str(result)
+
+
+def parse_meeting_summary(result):
+    """
+    Return (data, missing): data has summary and action_items (each a valid
+    ActionItem); missing lists the top-level fields that could not be
+    recovered.
+    """
+    from pydantic import ValidationError
+    from schemas import ActionItem
+
+    data = getattr(result, "json_dict", None) or extract_json(raw_text(result))
+    if isinstance(data, list):
+        data = {"action_items": data}
+    if not isinstance(data, dict):
+        return {"summary": "", "action_items": []}, ["summary", "action_items"]
+    # Some answers nest everything under meeting_summary
+    if isinstance(data.get("meeting_summary"), dict):
+        data = {**data["meeting_summary"], **{k: v for k, v in data.items() if k != "meeting_summary"}}
+
+    missing = []
+    summary = data.get("summary") or data.get("meeting_summary")
+    if not isinstance(summary, str) or not summary.strip():
+        missing.append("summary")
+        summary = ""
+    if not isinstance(data.get("action_items"), list):
+        missing.append("action_items")
+
+    action_items = []
+    for item in data.get("action_items") or []:
+        try:
+            action_items.append(ActionItem.model_validate(item).model_dump())
+        except ValidationError as e:
+            logger.warning(f"⚠️ Dropping invalid action item {item!r}: {e.errors()[0].get('msg')}")
+
+    return {"summary": summary, "action_items": action_items}, missing
+
+
+FIELD_SHAPES = {
+    "summary": '"summary": "concise meeting summary"',
+    "action_items": '"action_items": [{"employee_name": "...", "employee_email": "...", "task": "...", "deadline": "YYYY-MM-DD" or null}]',
+}
+
+
+def reask_missing(missing, source_text, complete, context=""):
+    """
+    Ask for just the missing fields with one plain completion.
+    complete(prompt) -> str. Returns the recovered fields (possibly empty).
+    """
+    prompt = f"""{context}
+TRANSCRIPT:
+{source_text}
+
+Return only a JSON object with these fields:
+{{{", ".join(FIELD_SHAPES[field] for field in missing)}}}
+"""
+    recovered, still_missing = parse_meeting_summary(complete(prompt))
+    return {field: recovered[field] for field in missing if field not in still_missing}
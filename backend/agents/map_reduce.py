@@ -0,0 +1,117 @@
+"""
+Map-reduce extraction for transcripts too long for one prompt.
+
+The transcript is cut on sentence boundaries into chunks of at most
+MAP_REDUCE_CHUNK_TOKENS (estimated at ~4 characters per token, which is
+close enough for Gemini and needs no tokenizer). Each chunk is sent to the
+model on its own, MAP_REDUCE_CONCURRENCY at a time. The partial results
+are merged: action items for the same person with near-identical wording
+are collapsed, and the partial summaries are combined in one short reduce
+call. Wall time is roughly ceil(chunks / concurrency) map calls plus the
+reduce, instead of growing with the full transcript on every agent turn.
+"""
+import os
+import re
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Transcripts estimated above this many tokens go through map-reduce
+MAP_REDUCE_MIN_TOKENS = int(os.getenv("MAP_REDUCE_MIN_TOKENS", "6000"))
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "2000"))
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+CHARS_PER_TOKEN = 4
+# Two tasks for one person with at least this word overlap are the same task
+DUPLICATE_TASK_SIMILARITY = 0.6
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+STOPWORDS = {"a", "an", "the", "to", "and", "or", "of", "for", "on", "in", "by", "with", "up", "be", "is"}
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def needs_map_reduce(transcript):
+    return estimate_tokens(transcript) > MAP_REDUCE_MIN_TOKENS
+
+
+def split_into_chunks(transcript, max_tokens=MAP_REDUCE_CHUNK_TOKENS):
+    """Consecutive chunks of whole sentences, each at most max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current, size = [], [], 0
+    for sentence in (s.strip() for s in SENTENCE_END.split(transcript)):
+        if not sentence:
+            continue
+        # A run-on "sentence" longer than a chunk is cut on word boundaries
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if size + len(sentence) + 1 > max_chars and current:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _task_words(task):
+    return {w for w in re.findall(r"[a-z0-9]+", (task or "").lower()) if w not in STOPWORDS}
+
+
+def _same_task(a, b):
+    words_a, words_b = _task_words(a), _task_words(b)
+    if not words_a or not words_b:
+        return words_a == words_b
+    return len(words_a & words_b) / len(words_a | words_b) >= DUPLICATE_TASK_SIMILARITY
+
+
+def merge_action_items(partials):
+    """Action items of all chunks in order, with repeats of the same task dropped."""
+    merged = []
+    for partial in partials:
+        for item in partial.get("action_items") or []:
+            if not isinstance(item, dict) or not item.get("task"):
+                continue
+            owner = (item.get("employee_email") or item.get("employee_name") or "").strip().lower()
+            duplicate = next((kept for kept in merged
+                              if (kept.get("employee_email") or kept.get("employee_name") or "").strip().lower() == owner
+                              and _same_task(kept["task"], item["task"])), None)
+            if duplicate is None:
+                merged.append(dict(item))
+            elif not duplicate.get("deadline") and item.get("deadline"):
+                # A later chunk often repeats the task with the date attached
+                duplicate["deadline"] = item["deadline"]
+    return merged
+
+
+def map_reduce(transcript, extract_chunk, combine_summaries, concurrency=MAP_REDUCE_CONCURRENCY,
+               max_tokens=MAP_REDUCE_CHUNK_TOKENS):
+    """
+    extract_chunk(chunk, index, total) -> {"summary", "action_items"} for one chunk.
+    combine_summaries(list of partial summaries) -> one summary string.
+    """
+    chunks = split_into_chunks(transcript, max_tokens)
+    logger.info(f"🔍 Map-reduce over {len(chunks)} chunks, {concurrency} at a time")
+    # Each chunk runs in a copy of this context so per-request metric labels follow it
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        partials = list(pool.map(lambda args: args[0].run(extract_chunk, *args[1:]),
+                                 [(contextvars.copy_context(), chunk, index, len(chunks))
+                                  for index, chunk in enumerate(chunks)]))
+
+    summaries = [p.get("summary", "").strip() for p in partials if p.get("summary", "").strip()]
+    summary = combine_summaries(summaries) if len(summaries) > 1 else (summaries[0] if summaries else "")
+    return {
+        "summary": summary,
+        "action_items": merge_action_items(partials),
+        "chunks": len(chunks),
+    }
@@ -0,0 +1,109 @@
+"""
+Prometheus metrics for the crew service, served at /metrics.
+
+Stage latencies go into one histogram, crew_stage_seconds, with a stage
+label:
+
+- roster_fetch: an employees query (roster cache misses only);
+- llm_call: an agent run or a single completion;
+- result_parse: turning model output into summary and action_items;
+- meeting_insert: the meeting write, or the save_meeting_with_tasks RPC,
+  which writes the tasks too;
+- task_insert: the tasks write when the RPC is not used.
+
+Counters cover LLM tokens in and out, parse failures and auto-created
+employees (from resolve_employees or the save_meeting_with_tasks RPC).
+A gauge tracks in-flight jobs. Everything is labelled by company and
+engine. job() sets those labels once per request in a context variable,
+so the functions that observe metrics don't need them passed in. Set METRICS_COMPANY_LABEL=off to collapse the company label
+on a service with many tenants.
+
+Under gunicorn each worker keeps its own values. gunicorn_conf.py points
+PROMETHEUS_MULTIPROC_DIR at a shared directory, and render() aggregates
+across workers from there.
+"""
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+
+METRICS_COMPANY_LABEL = os.getenv("METRICS_COMPANY_LABEL", "on").lower() not in ("0", "off", "false", "no")
+LABELS = ("company", "engine")
+# LLM calls take seconds to minutes; database writes take milliseconds
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram("crew_stage_seconds", "Latency of one processing stage",
+                          ("stage",) + LABELS, buckets=STAGE_BUCKETS)
+LLM_TOKENS = Counter("crew_llm_tokens_total", "LLM tokens, direction in (prompt) or out (completion)",
+                     ("direction",) + LABELS)
+PARSE_FAILURES = Counter("crew_parse_failures_total", "Model outputs missing fields after local repair", LABELS)
+EMPLOYEES_CREATED = Counter("crew_employees_created_total", "Employees created for unknown action-item emails", LABELS)
+JOBS_IN_FLIGHT = Gauge("crew_jobs_in_flight", "Transcripts being processed", LABELS, multiprocess_mode="livesum")
+
+_labels = contextvars.ContextVar("crew_metric_labels", default=("unknown", "unknown"))
+
+
+def current_labels():
+    return _labels.get()
+
+
+def set_engine(engine):
+    """Relabel the rest of this job, e.g. once the fast path or map-reduce is chosen."""
+    _labels.set((_labels.get()[0], engine))
+
+
+@contextmanager
+def job(company_id, engine):
+    """Label everything observed inside with company and engine, and count the job as in flight."""
+    token = _labels.set((str(company_id) if METRICS_COMPANY_LABEL else "all", engine))
+    gauge = JOBS_IN_FLIGHT.labels(*_labels.get())
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+        _labels.reset(token)
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage, *_labels.get()).observe(time.perf_counter() - started)
+
+
+def record_tokens(prompt_tokens, completion_tokens):
+    labels = _labels.get()
+    if prompt_tokens:
+        LLM_TOKENS.labels("in", *labels).inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels("out", *labels).inc(completion_tokens)
+
+
+def record_usage(usage):
+    """Token counts from a litellm usage object or crewai UsageMetrics (None is ignored)."""
+    if usage is not None:
+        record_tokens(getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+
+def parse_failure():
+    PARSE_FAILURES.labels(*_labels.get()).inc()
+
+
+def employees_created(count):
+    if count:
+        EMPLOYEES_CREATED.labels(*_labels.get()).inc(count)
+
+
+def render():
+    """(body, content type) for the /metrics response."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,240 @@
+"""
+Fuzzy index from spoken names to a company's employees.
+
+Whisper mangles names ("say Shasayee" for Aseshasayee), and the LLM then
+guesses an email that is not on the roster. The index stores each
+employee's full name, first name and last name as aliases and matches a
+mention in three ways:
+
+- phonetic key: a small metaphone-style key, so Stephen/Steven and
+  Nisha/Neesha collide;
+- character trigrams: an inverted index that finds candidates in a few
+  dictionary lookups and catches a mention that is part of a longer name;
+- bounded edit distance: checks the candidates, and gives up once the
+  distance passes a third of the alias length.
+
+A match is only returned when it is clearly better than the best match for
+any other employee. sync() re-indexes only the employees whose name
+changed, so keeping the index in step with the roster cache is cheap.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.75"))
+# Top match must beat the runner-up (a different employee) by this much
+AMBIGUITY_MARGIN = 0.05
+MAX_CANDIDATES = 12
+MAX_MEMO_ENTRIES = 4096
+
+PHONETIC_RULES = [
+    ("ph", "f"), ("ck", "k"), ("sch", "sk"), ("sh", "s"), ("ch", "k"), ("th", "t"), ("gh", "g"),
+    ("kn", "n"), ("wr", "r"), ("qu", "kw"), ("x", "ks"), ("z", "s"), ("c", "k"), ("q", "k"),
+    ("v", "f"), ("w", ""), ("y", "i"), ("h", ""),
+]
+# Capitalized words that start sentences or address the room, never names
+COMMON_WORDS = set("""
+a about after again all also am an and any are as at be because been before being but by can could
+did do does done during each everyone everybody few finally first for from further good great had has
+have having he her here hers him his how i if in into is it its just let lets like make me meeting more
+most my need next no nor not now of off ok okay on once only or other our ours out over please project
+really right same say she should so some such task team than thank thanks that the their them then
+there these they this those through to today tomorrow too under until up us very want was we well were
+what when where which while who whom why will with would yes yet you your yours yeah also alright
+monday tuesday wednesday thursday friday saturday sunday january february march april may june july
+august september october november december
+""".split())
+
+
+def normalize(name):
+    return " ".join(re.findall(r"[a-z]+", (name or "").lower()))
+
+
+def phonetic_key(word):
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    if not word:
+        return ""
+    # Keep the first letter, drop later vowels, collapse doubled letters
+    key = word[0]
+    for ch in word[1:]:
+        if ch in "aeiou" or ch == key[-1]:
+            continue
+        key += ch
+    return key
+
+
+def trigrams(text):
+    text = text.replace(" ", "")
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """Edit distance, or None as soon as it must exceed max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class NameIndex:
+    def __init__(self, employees=()):
+        self._employees = {}    # id -> employee dict
+        self._names = {}        # id -> normalized name the aliases came from
+        self._aliases = {}      # alias -> set of employee ids
+        self._by_trigram = {}   # trigram -> set of aliases
+        self._by_phonetic = {}  # phonetic key -> set of aliases
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._synced = None
+        self.sync(list(employees))
+
+    def sync(self, employees):
+        """Bring the index in line with the roster, touching only changed employees."""
+        if employees is self._synced:
+            return
+        with self._lock:
+            current = {e.get("id"): e for e in employees if e.get("name")}
+            for employee_id in [i for i in self._names if i not in current]:
+                self._remove(employee_id)
+            for employee_id, employee in current.items():
+                name = normalize(employee["name"])
+                if self._names.get(employee_id) != name:
+                    self._remove(employee_id)
+                    self._add(employee_id, name)
+                self._employees[employee_id] = employee
+            self._memo.clear()
+            self._synced = employees
+
+    @staticmethod
+    def _aliases_for(name):
+        tokens = name.split()
+        return {name, *[t for t in tokens if len(t) > 1]}
+
+    def _add(self, employee_id, name):
+        self._names[employee_id] = name
+        for alias in self._aliases_for(name):
+            ids = self._aliases.setdefault(alias, set())
+            if not ids:
+                for gram in trigrams(alias):
+                    self._by_trigram.setdefault(gram, set()).add(alias)
+                self._by_phonetic.setdefault(phonetic_key(alias), set()).add(alias)
+            ids.add(employee_id)
+
+    def _remove(self, employee_id):
+        name = self._names.pop(employee_id, None)
+        self._employees.pop(employee_id, None)
+        if name is None:
+            return
+        for alias in self._aliases_for(name):
+            ids = self._aliases.get(alias)
+            if not ids:
+                continue
+            ids.discard(employee_id)
+            if not ids:
+                del self._aliases[alias]
+                for gram in trigrams(alias):
+                    self._by_trigram.get(gram, set()).discard(alias)
+                self._by_phonetic.get(phonetic_key(alias), set()).discard(alias)
+
+    def _score(self, query, alias):
+        if query == alias:
+            return 1.0
+        score = 0.0
+        key = phonetic_key(query)
+        if len(key) >= 2 and key == phonetic_key(alias):
+            score = 0.9
+        longest = max(len(query), len(alias))
+        distance = bounded_levenshtein(query, alias, max(1, len(alias) // 3))
+        if distance is not None:
+            score = max(score, 1 - distance / longest)
+        # A mention that is the tail or middle of a longer name ("Shasayee")
+        query_grams = trigrams(query)
+        if len(query) >= 5 and query_grams:
+            contained = len(query_grams & trigrams(alias)) / len(query_grams)
+            if contained >= 0.8:
+                score = max(score, 0.85 * contained)
+        return score
+
+    def match(self, mention):
+        """Return (employee, score) for a spoken name, or None when no clear match."""
+        query = normalize(mention)
+        if not query:
+            return None
+        if query in self._memo:
+            return self._memo[query]
+
+        with self._lock:
+            counts = {}
+            for gram in trigrams(query):
+                for alias in self._by_trigram.get(gram, ()):
+                    counts[alias] = counts.get(alias, 0) + 1
+            candidates = set(sorted(counts, key=counts.get, reverse=True)[:MAX_CANDIDATES])
+            candidates |= self._by_phonetic.get(phonetic_key(query), set())
+            best = {}
+            for alias in candidates:
+                score = self._score(query, alias)
+                for employee_id in self._aliases.get(alias, ()):
+                    if score > best.get(employee_id, 0.0):
+                        best[employee_id] = score
+            ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+            result = None
+            if ranked and ranked[0][1] >= NAME_MATCH_THRESHOLD:
+                if len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= AMBIGUITY_MARGIN:
+                    result = (self._employees[ranked[0][0]], round(ranked[0][1], 3))
+            if len(self._memo) >= MAX_MEMO_ENTRIES:
+                self._memo.clear()
+            self._memo[query] = result
+            return result
+
+    def find_mentions(self, text):
+        """Employees named in text: list of (employee, score, mention), best score per employee."""
+        tokens = re.findall(r"[A-Za-z][A-Za-z'-]*", text or "")
+        found = {}
+        for i, token in enumerate(tokens):
+            if not token[0].isupper() or token.lower() in COMMON_WORDS or len(token) < 3:
+                continue
+            queries = [token]
+            if i + 1 < len(tokens) and tokens[i + 1][0].isupper() and tokens[i + 1].lower() not in COMMON_WORDS:
+                queries.append(f"{token} {tokens[i + 1]}")
+            for query in queries:
+                matched = self.match(query)
+                if matched and matched[1] > found.get(matched[0].get("id"), (None, 0.0))[1]:
+                    found[matched[0].get("id")] = (matched[0], matched[1], query)
+        return sorted(found.values(), key=lambda m: m[1], reverse=True)
+
+    def __len__(self):
+        return len(self._names)
+
+
+class NameIndexes:
+    """One NameIndex per company, kept in step with the cached roster."""
+
+    def __init__(self, max_companies):
+        self.max_companies = max_companies
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_roster(self, company_id, employees):
+        with self._lock:
+            index = self._indexes.get(company_id)
+            if index is None:
+                index = self._indexes[company_id] = NameIndex()
+            self._indexes.move_to_end(company_id)
+            while len(self._indexes) > self.max_companies:
+                self._indexes.popitem(last=False)
+        index.sync(employees)
+        return index
@@ -0,0 +1,139 @@
+"""
+Cache of LLM extraction results, in memory and on disk.
+
+Ops often re-run a meeting after fixing an unrelated roster entry, and the
+crew produced the same answer again at full cost. A result is keyed by a
+hash of the normalized transcript, a fingerprint of the company's roster,
+the model name, PROMPT_VERSION and the date relative deadlines are
+resolved against, so any change that could alter the output misses the
+cache and nothing else does.
+
+Hot entries live in an in-memory LRU. Every entry is also written to a
+SQLite file, so results survive restarts and are shared by every worker
+process on the machine.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "on").lower() not in ("0", "off", "false", "no")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "result_cache.sqlite3"))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "512"))
+RESULT_CACHE_DISK_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_ENTRIES", "20000"))
+
+
+def normalize_transcript(transcript):
+    return " ".join(transcript.split())
+
+
+def roster_fingerprint(employees):
+    """Changes whenever someone who could be assigned a task is added, removed or renamed."""
+    rows = sorted((str(e.get("id")), e.get("name") or "", (e.get("email") or "").lower()) for e in employees or [])
+    return hashlib.sha256(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+def cache_key(transcript, employees, model, prompt_version, reference_date):
+    """reference_date: the meeting date the prompts call "today" ("by Friday" depends on it)."""
+    parts = [normalize_transcript(transcript), roster_fingerprint(employees), model, str(prompt_version),
+             reference_date.isoformat()]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=RESULT_CACHE_PATH, memory_entries=RESULT_CACHE_MEMORY_ENTRIES,
+                 disk_entries=RESULT_CACHE_DISK_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.bypassed = 0
+
+    def _connection(self):
+        # Opened lazily so importing crew.py never touches the disk
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed_at)")
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(self._memory[key])
+            db = self._connection()
+            row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, result):
+        # Stored as JSON text so callers can't mutate a cached entry
+        value = json.dumps(result)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value)
+            db = self._connection()
+            db.execute("INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                       (key, value, now, now))
+            self.writes += 1
+            if self.writes % 100 == 0:
+                db.execute("DELETE FROM results WHERE key NOT IN "
+                           "(SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?)", (self.disk_entries,))
+            db.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            db.execute("DELETE FROM results")
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            disk_entries = self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": RESULT_CACHE_ENABLED,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "bypassed": self.bypassed,
+            }
@@ -0,0 +1,145 @@
+"""
+In-process cache of each company's employee roster.
+
+Every transcript needs the roster twice: once for the agent's
+get_company_employees tool and once in save_tasks_to_database. Entries are
+keyed by company_id and hold only the columns the service uses. They expire
+after a TTL, the least recently used company is dropped once the cache is
+full, and the Node side calls invalidate() when the team page edits an
+employee.
+
+Under gunicorn that call reaches only one worker process. So invalidate()
+also bumps a per-company version stamp in a small SQLite file shared by
+every worker (SharedInvalidations). get() compares an entry's stamp with
+the current one and reloads when another process has invalidated it.
+That costs one indexed SQLite read per lookup. Anything built from the
+roster, such as the name index, follows because it syncs from get().
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ROSTER_COLUMNS = "id, name, email, department"
+ROSTER_TTL_SECONDS = float(os.getenv("ROSTER_CACHE_TTL", "300"))
+ROSTER_MAX_COMPANIES = int(os.getenv("ROSTER_CACHE_MAX_COMPANIES", "256"))
+ROSTER_INVALIDATIONS_PATH = os.getenv("ROSTER_INVALIDATIONS_PATH",
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crew_invalidations.sqlite3"))
+ALL_COMPANIES = "*"
+
+
+class SharedInvalidations:
+    """Per-company invalidation stamps shared between processes through SQLite."""
+
+    def __init__(self, path=ROSTER_INVALIDATIONS_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections are not thread-safe
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS stamps (company_id TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._local.db = db
+        return db
+
+    def version(self, company_id):
+        """Current stamp for company_id (covers invalidate-all); 0 when never invalidated."""
+        row = self._db().execute("SELECT max(version) FROM stamps WHERE company_id IN (?, ?)",
+                                 (str(company_id), ALL_COMPANIES)).fetchone()
+        return row[0] or 0
+
+    def bump(self, company_id=None):
+        key = ALL_COMPANIES if company_id is None else str(company_id)
+        self._db().execute(
+            "INSERT INTO stamps (company_id, version) VALUES (?, (SELECT coalesce(max(version), 0) + 1 FROM stamps))"
+            " ON CONFLICT(company_id) DO UPDATE SET version = excluded.version", (key,))
+
+
+class RosterCache:
+    def __init__(self, loader, ttl=ROSTER_TTL_SECONDS, max_entries=ROSTER_MAX_COMPANIES, shared=None):
+        """
+        loader(company_id) -> list of employee dicts. shared is a
+        SharedInvalidations for invalidations across worker processes.
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries = OrderedDict()  # company_id -> (expires_at, employees, stamp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _stamp(self, company_id):
+        if self.shared is None:
+            return 0
+        try:
+            return self.shared.version(company_id)
+        except sqlite3.Error as e:
+            # Without the shared stamps only this process's invalidations apply
+            logger.warning(f"⚠️ Shared invalidation stamps unavailable: {e}")
+            return 0
+
+    def get(self, company_id):
+        now = time.monotonic()
+        # Read before loading: an invalidation during the load makes the next get reload again
+        stamp = self._stamp(company_id)
+        with self._lock:
+            entry = self._entries.get(company_id)
+            if entry and entry[0] > now and entry[2] >= stamp:
+                self._entries.move_to_end(company_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Load outside the lock so one slow company doesn't block the others
+        employees = self.loader(company_id)
+        self.put(company_id, employees, stamp)
+        return employees
+
+    def put(self, company_id, employees, stamp=0):
+        with self._lock:
+            self._entries[company_id] = (time.monotonic() + self.ttl, employees, stamp)
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, company_id=None):
+        """Drop one company's roster, or every roster when company_id is None."""
+        with self._lock:
+            if company_id is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                dropped = 1 if self._entries.pop(company_id, None) is not None else 0
+            self.invalidations += 1
+        if self.shared is not None:
+            try:
+                self.shared.bump(company_id)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not share roster invalidation with other workers: {e}")
+        return dropped
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,16 @@
+"""Pydantic models for the crew service's structured output."""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ActionItem(BaseModel):
+    employee_name: Optional[str] = None
+    employee_email: Optional[str] = None
+    task: str
+    deadline: Optional[str] = None
+
+
+class MeetingSummary(BaseModel):
+    summary: str
+    action_items: List[ActionItem]
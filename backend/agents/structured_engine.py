@@ -0,0 +1,57 @@
+"""
+Single-call extraction engine with schema-constrained output.
+
+The crew engine needs at least two model round trips: the agent asks for
+the roster through its tool, then answers in free text that has to be
+scraped for JSON. This engine looks the roster up in Python, puts a
+compact projection of it in the prompt, and asks the model once for JSON
+matching schemas.MeetingSummary through litellm's response_format. The
+reply is validated with the same pydantic model.
+"""
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You turn meeting transcripts into a short summary and a list of action items. "
+    "Assign each action item to one of the listed employees, copying their name and email exactly. "
+    "If nobody on the list is responsible, leave employee_name and employee_email null. "
+    "Deadlines are ISO dates (YYYY-MM-DD) or null."
+)
+
+
+def project_roster(employees):
+    """One 'name <email>' line per employee: all the model needs to assign tasks."""
+    return "\n".join(f"- {e.get('name')} <{e.get('email')}>" for e in employees or []) or "(no employees on file)"
+
+
+def build_messages(transcript, employees, today):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Today is {today}.\n\nEMPLOYEES:\n{project_roster(employees)}\n\nTRANSCRIPT:\n{transcript}"},
+    ]
+
+
+def extract(transcript, employees, model, api_key, today, temperature=0.2):
+    """Return {"summary", "action_items"} from one completion."""
+    from litellm import completion
+    from schemas import MeetingSummary
+
+    with metrics.timed("llm_call"):
+        response = completion(
+            model=model,
+            api_key=api_key,
+            messages=build_messages(transcript, employees, today),
+            response_format=MeetingSummary,
+            temperature=temperature,
+        )
+    metrics.record_usage(getattr(response, "usage", None))
+    content = response.choices[0].message.content
+    with metrics.timed("result_parse"):
+        try:
+            return MeetingSummary.model_validate_json(content).model_dump()
+        except Exception:
+            metrics.parse_failure()
+            raise
@@ -0,0 +1,34 @@
+"""When normalize_deadlines may override the model's date (run with pytest from backend/agents)."""
+from datetime import date
+
+from deadlines import normalize_deadlines
+
+ANCHOR = date(2025, 10, 15)  # a Wednesday
+
+
+def deadline(task, given, transcript):
+    items, _ = normalize_deadlines([{"task": task, "deadline": given}], transcript, ANCHOR)
+    return items[0]["deadline"]
+
+
+def test_incidental_today_does_not_override_valid_date():
+    transcript = "As we said today, Nisha, I need you to finish the quarterly report by Friday."
+    assert deadline("Finish the quarterly report", "2025-10-17", transcript) == "2025-10-17"
+
+
+def test_earlier_date_in_sentence_is_not_the_deadline():
+    transcript = "On Monday you said the deck was late, so please send the final deck by October 30th."
+    assert deadline("Send the final deck", "2025-10-30", transcript) == "2025-10-30"
+
+
+def test_single_tied_phrase_corrects_the_model():
+    transcript = "Nisha, I need you to finish the Udemy course within 20th October."
+    assert deadline("Finish the Udemy course", "2024-10-20", transcript) == "2025-10-20"
+
+
+def test_missing_date_is_filled_from_the_sentence():
+    assert deadline("Update the poster", None, "Ravi, update the poster on Saturday.") == "2025-10-18"
+
+
+def test_invalid_date_without_transcript_support_is_dropped():
+    assert deadline("Book the venue", "sometime soon", "Priya will book the venue.") is None
@@ -0,0 +1,54 @@
+"""False positives the rule-based fast path must not turn into tasks (run with pytest from backend/agents)."""
+from datetime import date
+
+from fast_extract import FAST_PATH_MIN_CONFIDENCE, extract
+
+TODAY = date(2025, 10, 15)  # a Wednesday
+ROSTER = [{"name": "Nisha Rao", "email": "nisha@example.com"}, {"name": "Ravi Kumar", "email": "ravi@example.com"}]
+
+
+def tasks(transcript):
+    return [item["task"] for item in extract(transcript, ROSTER, TODAY)["action_items"]]
+
+
+def test_plain_request_is_trusted():
+    result = extract("Nisha, I need you to finish the Udemy course by Friday.", ROSTER, TODAY)
+    assert result["action_items"][0]["task"] == "Finish the Udemy course"
+    assert result["action_items"][0]["deadline"] == "2025-10-17"
+    assert result["confidence"] >= FAST_PATH_MIN_CONFIDENCE
+
+
+def test_rhetorical_question_is_not_a_task():
+    assert tasks("Nisha, can you believe how long this meeting ran?") == []
+
+
+def test_questions_are_left_to_the_llm():
+    result = extract("Ravi, could you send the deck by Friday?", ROSTER, TODAY)
+    assert result["action_items"] == []
+    assert result["confidence"] < FAST_PATH_MIN_CONFIDENCE
+
+
+def test_future_state_is_not_a_task():
+    assert tasks("Nisha will be on leave next week.") == []
+    assert tasks("Ravi is going to be out on Monday.") == []
+    assert tasks("Nisha will be away until Friday.") == []
+
+
+def test_future_action_is_a_task():
+    assert tasks("Ravi will update the poster on Saturday.") == ["Update the poster"]
+
+
+def test_discussion_lowers_confidence_below_threshold():
+    transcript = ("Nisha, I need you to finish the Udemy course by Friday. "
+                  "We spent a while on the launch plan and the budget numbers. "
+                  "The vendor still has not confirmed the venue for the offsite. "
+                  "Marketing thinks the poster colours need another pass.")
+    result = extract(transcript, ROSTER, TODAY)
+    assert len(result["action_items"]) == 1
+    assert result["confidence"] < FAST_PATH_MIN_CONFIDENCE
+
+
+def test_short_filler_does_not_lower_confidence():
+    result = extract("Okay, Nisha. Please finish the Udemy course by Friday. Thanks.", ROSTER, TODAY)
+    assert [item["employee_name"] for item in result["action_items"]] == ["Nisha Rao"]
+    assert result["confidence"] >= FAST_PATH_MIN_CONFIDENCE
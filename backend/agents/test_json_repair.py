@@ -0,0 +1,40 @@
+"""Truncation and repair cases for json_repair.extract_json (run with pytest from backend/agents)."""
+from json_repair import extract_json
+
+
+def test_truncated_after_finished_item_keeps_every_field():
+    text = '{"summary": "S", "action_items": [{"task": "A", "employee_email": "a@x"}'
+    assert extract_json(text) == {"summary": "S", "action_items": [{"task": "A", "employee_email": "a@x"}]}
+
+
+def test_truncated_after_finished_item_and_comma():
+    text = '{"summary": "S", "action_items": [{"task": "A", "employee_email": "a@x"}, '
+    assert extract_json(text) == {"summary": "S", "action_items": [{"task": "A", "employee_email": "a@x"}]}
+
+
+def test_truncated_inside_second_item_keeps_first_whole():
+    text = ('{"summary": "S", "action_items": [{"task": "A", "employee_email": "a@x", "deadline": null}, '
+            '{"task": "B", "employee_email": "b@')
+    result = extract_json(text)
+    assert result["action_items"][0] == {"task": "A", "employee_email": "a@x", "deadline": None}
+    assert all(item.get("employee_email") != "b@" for item in result["action_items"])
+
+
+def test_truncated_after_finished_array():
+    text = '{"action_items": [{"task": "A", "employee_email": "a@x"}]'
+    assert extract_json(text) == {"action_items": [{"task": "A", "employee_email": "a@x"}]}
+
+
+def test_truncated_summary_string_is_closed():
+    assert extract_json('{"summary": "The team discussed the poster and') == {
+        "summary": "The team discussed the poster and"}
+
+
+def test_fenced_json_with_trailing_comma_and_python_literals():
+    text = 'Here you go:\n```json\n{"summary": "S", "action_items": [{"task": "A", "deadline": None},],}\n```'
+    assert extract_json(text) == {"summary": "S", "action_items": [{"task": "A", "deadline": None}]}
+
+
+def test_braces_inside_strings_do_not_confuse_the_scanner():
+    text = 'Note {draft} first. {"summary": "Use {x} and [y]", "action_items": []}'
+    assert extract_json(text) == {"summary": "Use {x} and [y]", "action_items": []}
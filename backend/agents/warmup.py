@@ -0,0 +1,73 @@
+"""
+Background warm-up for the crew service's heavy dependencies.
+
+crewai, crewai_tools and supabase take seconds to import. Loading them on
+a background thread lets Flask answer /health at once. Each step is timed,
+so /ready can show where startup time goes.
+"""
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    def __init__(self, steps):
+        """steps: ordered list of (name, zero-argument callable)."""
+        self.steps = steps
+        self.results = {}
+        self.timings_ms = {}
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.perf_counter()
+        threading.Thread(target=self._run, name="crew-warmup", daemon=True).start()
+
+    def _run(self):
+        try:
+            for name, step in self.steps:
+                started = time.perf_counter()
+                self.results[name] = step()
+                self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                logger.info(f"⏱️ Warm-up step {name}: {self.timings_ms[name]} ms")
+        except Exception as e:
+            self.error = e
+            logger.error(f"❌ Warm-up failed at {name}: {e}")
+        finally:
+            self.finished_at = time.perf_counter()
+            self._done.set()
+        if not self.error:
+            logger.info(f"✅ Warm-up finished in {self.finished_at - self.started_at:.2f}s")
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def get(self, name, timeout=120):
+        """Return a warm-up result, waiting for the warm-up to finish if needed."""
+        self.start()
+        if not self._done.wait(timeout):
+            raise RuntimeError("Service is still warming up")
+        if name not in self.results:
+            raise RuntimeError(f"Warm-up failed: {self.error}")
+        return self.results[name]
+
+    def status(self):
+        status = {
+            "ready": self.ready,
+            "completed_steps": list(self.timings_ms),
+            "timings_ms": dict(self.timings_ms),
+        }
+        if self.finished_at is not None:
+            status["total_ms"] = round((self.finished_at - self.started_at) * 1000, 1)
+        if self.error is not None:
+            status["error"] = str(self.error)
+        return status
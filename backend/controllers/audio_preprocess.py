@@ -0,0 +1,78 @@
+"""
+Single-pass ffmpeg normalization shared by the transcription back ends.
+
+Whatever container the upload came in, ffmpeg reads it once and writes the
+result straight to a pipe: 16 kHz mono PCM for local Whisper, or compact
+Opus-in-Ogg for uploads to the Hugging Face Space. Nothing is written to a
+temp file. Every call returns a stats dict so callers can report how many
+bytes and how much decode time the stage took or saved.
+"""
+import os
+import time
+import subprocess
+
+SAMPLE_RATE = 16000
+OPUS_BITRATE = os.environ.get('HF_OPUS_BITRATE', '32k')
+
+
+class PreprocessError(Exception):
+    pass
+
+
+def _run_ffmpeg(audio_path, output_args, start=None, duration=None):
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    # -ss/-t before -i seek in the demuxer instead of decoding from the start
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration is not None:
+        cmd += ["-t", str(duration)]
+    cmd += ["-i", audio_path, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE)] + output_args + ["-"]
+
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise PreprocessError("ffmpeg is not installed")
+    except subprocess.CalledProcessError as e:
+        raise PreprocessError(f"ffmpeg failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout, time.perf_counter() - started
+
+
+def decode_pcm(audio_path, start=None, duration=None):
+    """Decode to 16 kHz mono float32 samples, ready for model.transcribe()."""
+    import numpy as np
+    pcm, elapsed = _run_ffmpeg(audio_path, ["-f", "s16le", "-acodec", "pcm_s16le"], start, duration)
+    audio = np.frombuffer(pcm, np.int16).flatten().astype(np.float32) / 32768.0
+    stats = {
+        "input_bytes": os.path.getsize(audio_path),
+        "output_bytes": len(pcm),
+        "audio_seconds": len(audio) / SAMPLE_RATE,
+        "decode_seconds": elapsed,
+    }
+    return audio, stats
+
+
+def encode_opus(audio_path, start=None, duration=None, bitrate=OPUS_BITRATE):
+    """Re-encode to mono Opus in an Ogg container for remote upload."""
+    data, elapsed = _run_ffmpeg(
+        audio_path, ["-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg"],
+        start, duration)
+    input_bytes = os.path.getsize(audio_path)
+    stats = {
+        "input_bytes": input_bytes,
+        "output_bytes": len(data),
+        "bytes_saved": max(0, input_bytes - len(data)) if start is None and duration is None else None,
+        "decode_seconds": elapsed,
+    }
+    return data, stats
+
+
+def describe(stats):
+    """One-line summary of a stats dict for logs."""
+    line = (f"{stats['input_bytes'] / 1e6:.2f} MB in -> {stats['output_bytes'] / 1e6:.2f} MB out, "
+            f"ffmpeg {stats['decode_seconds']:.2f}s")
+    if stats.get('bytes_saved'):
+        line += f", saved {stats['bytes_saved'] / 1e6:.2f} MB of upload"
+    if stats.get('audio_seconds'):
+        line += f", {stats['audio_seconds']:.1f}s of audio"
+    return line
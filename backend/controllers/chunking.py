@@ -0,0 +1,170 @@
+"""
+Parallel chunked transcription for long recordings.
+
+The audio is split into fixed windows that overlap by a few seconds. Each
+window is decoded and transcribed in a worker process (one Whisper model per
+worker), then the segments are stitched back together in order. Segments are
+assigned to the window whose core covers their midpoint, and any words
+repeated across a window boundary are dropped.
+"""
+import os
+import json
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_preprocess import SAMPLE_RATE, decode_pcm
+CHUNK_SECONDS = float(os.environ.get('WHISPER_CHUNK_SECONDS', '120'))
+CHUNK_OVERLAP = float(os.environ.get('WHISPER_CHUNK_OVERLAP', '5'))
+# Streaming jobs decode short windows one after another on the resident model
+STREAM_WINDOW_SECONDS = float(os.environ.get('WHISPER_STREAM_WINDOW_SECONDS', '30'))
+STREAM_OVERLAP = float(os.environ.get('WHISPER_STREAM_OVERLAP', '2'))
+
+_worker_model = None
+
+
+def probe_duration(audio_path):
+    """Return the audio duration in seconds using ffprobe."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", audio_path],
+        capture_output=True, text=True, check=True)
+    return float(json.loads(result.stdout)["format"]["duration"])
+
+
+def plan_windows(duration, window=CHUNK_SECONDS, overlap=CHUNK_OVERLAP):
+    """Split [0, duration) into overlapping (start, end) windows."""
+    if window <= overlap:
+        raise ValueError("window must be longer than overlap")
+    windows = []
+    start = 0.0
+    while True:
+        end = min(start + window, duration)
+        windows.append((start, end))
+        if end >= duration:
+            return windows
+        start = end - overlap
+
+
+def _init_worker(model_name):
+    global _worker_model
+    import torch
+    import whisper
+    # Each process gets one core; the pool provides the parallelism
+    torch.set_num_threads(1)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_window(args):
+    audio_path, start, end, language = args
+    # Each worker decodes only its own window
+    audio, _ = decode_pcm(audio_path, start, end - start)
+    result = _worker_model.transcribe(audio, language=language, fp16=False)
+    return [{"start": s['start'] + start, "end": s['end'] + start, "text": s['text'].strip()}
+            for s in result.get('segments', [])]
+
+
+def drop_repeated_prefix(previous_text, text, max_words=12):
+    """Remove words at the start of text that repeat the end of previous_text."""
+    prev_words = previous_text.split()
+    words = text.split()
+    for n in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        tail = [w.strip('.,!?').lower() for w in prev_words[-n:]]
+        head = [w.strip('.,!?').lower() for w in words[:n]]
+        if tail == head:
+            return " ".join(words[n:])
+    return text
+
+
+def stitch_windows(windows, window_segments):
+    """Merge per-window segments (absolute timestamps) into one ordered list.
+
+    window_segments may cover only the first few windows of the plan.
+    """
+    stitched = []
+    for i, ((start, end), segments) in enumerate(zip(windows, window_segments)):
+        # The core of a window runs from the middle of the previous overlap to
+        # the middle of the next one
+        core_start = (start + windows[i - 1][1]) / 2 if i > 0 else float('-inf')
+        core_end = (windows[i + 1][0] + end) / 2 if i + 1 < len(windows) else float('inf')
+        first_in_window = True
+        for segment in segments:
+            midpoint = (segment['start'] + segment['end']) / 2
+            if not core_start <= midpoint < core_end:
+                continue
+            text = segment['text']
+            if first_in_window and stitched:
+                text = drop_repeated_prefix(stitched[-1]['text'], text)
+            first_in_window = False
+            if text:
+                stitched.append({**segment, "text": text})
+    return stitched
+
+
+def transcribe_streaming(model, audio_path, language="en", on_segment=None,
+                         window=STREAM_WINDOW_SECONDS, overlap=STREAM_OVERLAP):
+    """Transcribe window by window on one model, reporting segments as they settle.
+
+    The text decoded so far is passed as the prompt for the next window so
+    Whisper keeps its context across window boundaries.
+    """
+    # Decode once and slice windows out of memory
+    audio, _ = decode_pcm(audio_path)
+    windows = plan_windows(len(audio) / SAMPLE_RATE, window, overlap)
+    window_segments = []
+    stitched = []
+    for start, end in windows:
+        prompt = " ".join(s['text'] for s in stitched[-5:]) or None
+        samples = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        result = model.transcribe(samples, language=language, fp16=False, initial_prompt=prompt)
+        window_segments.append([{"start": s['start'] + start, "end": s['end'] + start, "text": s['text'].strip()}
+                                for s in result.get('segments', [])])
+        new_stitched = stitch_windows(windows, window_segments)
+        if on_segment:
+            for segment in new_stitched[len(stitched):]:
+                on_segment(segment)
+        stitched = new_stitched
+    return stitched
+
+
+class ChunkedTranscriber:
+    """Keeps a process pool of loaded models alive between jobs."""
+
+    def __init__(self, model_name, workers=None):
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # spawn, not fork: the parent may already hold a loaded model and threads
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self.model_name,))
+        return self._pool
+
+    def transcribe(self, audio_path, language="en", on_segment=None,
+                   window=CHUNK_SECONDS, overlap=CHUNK_OVERLAP):
+        windows = plan_windows(probe_duration(audio_path), window, overlap)
+        jobs = [(audio_path, start, end, language) for start, end in windows]
+
+        # map() yields in submission order, so each window can be stitched
+        # as soon as it and everything before it is done
+        window_segments = []
+        emitted = 0
+        for segments in self.pool.map(_transcribe_window, jobs):
+            window_segments.append(segments)
+            if on_segment:
+                # Core boundaries come from the full plan, so segments from
+                # finished windows never change once stitched
+                stitched = stitch_windows(windows, window_segments)
+                for segment in stitched[emitted:]:
+                    on_segment(segment)
+                emitted = len(stitched)
+
+        return stitch_windows(windows, window_segments)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,211 @@
+"""
+HTTP client for the Hugging Face transcription Space.
+
+- One requests.Session per process with a keep-alive connection pool, so
+  repeated and concurrent uploads reuse TCP/TLS connections.
+- Jittered exponential backoff on connection errors, timeouts, 429 and 5xx,
+  honouring Retry-After when the Space sends it.
+- Multipart bodies are streamed in fixed-size chunks with a Content-Length, so
+  memory use stays bounded whatever the file size, and upload progress can
+  be reported as it goes.
+
+Run hf_stub_server.py and point HF_SPACE_URL at it to exercise all of this
+locally.
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_SPACE_URL = 'https://aseshasayee1-whisper-transcriber.hf.space'
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Upper bound on concurrent requests to the Space from one process
+MAX_IN_FLIGHT = int(os.environ.get('HF_MAX_IN_FLIGHT', '4'))
+
+
+class TranscriptionError(Exception):
+    def __init__(self, message, retryable=False, status=None, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _multipart_parts(field, filename, mime_type, boundary):
+    head = (f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: {mime_type}\r\n\r\n').encode('utf-8')
+    tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return head, tail
+
+
+def _source_size(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return os.path.getsize(source)
+
+
+def _iter_source(source, chunk_size):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size].tobytes()
+        return
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
+
+
+class MultipartUpload:
+    """
+    A single-file multipart/form-data body streamed in chunks.
+
+    The body has a known length, so it is sent with Content-Length rather
+    than chunked encoding. body() returns a fresh _Body, which lets each
+    retry start over.
+    """
+
+    def __init__(self, source, filename, mime_type, field='file', chunk_size=UPLOAD_CHUNK_SIZE):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.head, self.tail = _multipart_parts(field, filename, mime_type, self.boundary)
+        self.length = len(self.head) + _source_size(source) + len(self.tail)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def body(self, on_progress=None):
+        return _Body(self, on_progress)
+
+    def _iter_body(self, on_progress):
+        sent = 0
+        for chunk in self._chunks():
+            sent += len(chunk)
+            yield chunk
+            if on_progress:
+                on_progress(sent, self.length)
+
+    def _chunks(self):
+        yield self.head
+        yield from _iter_source(self.source, self.chunk_size)
+        yield self.tail
+
+
+class _Body:
+    """
+    Iterable request body with a length. requests reads len() and sends
+    Content-Length; a bare generator would make it add Transfer-Encoding:
+    chunked as well, without chunk-framing the body.
+    """
+
+    def __init__(self, upload, on_progress):
+        self.upload = upload
+        self.on_progress = on_progress
+
+    def __len__(self):
+        return self.upload.length
+
+    def __iter__(self):
+        return self.upload._iter_body(self.on_progress)
+
+
+class HFSpaceClient:
+    def __init__(self, base_url=None, token=None, pool_size=8, max_retries=4,
+                 backoff_base=1.0, backoff_max=30.0, connect_timeout=10, read_timeout=300):
+        base_url = base_url or os.environ.get('HF_SPACE_URL', DEFAULT_SPACE_URL)
+        self.url = base_url if base_url.endswith('/transcribe') else f"{base_url.rstrip('/')}/transcribe"
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        # Retries are handled here so Retry-After and jitter can be applied
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        token = token if token is not None else os.environ.get('HUGGINGFACE_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        # Full jitter keeps concurrent uploads from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post_once(self, upload, on_progress):
+        try:
+            response = self.session.post(
+                self.url, data=upload.body(on_progress), timeout=self.timeout,
+                headers={'Content-Type': upload.content_type})
+        except requests.exceptions.Timeout:
+            raise TranscriptionError("Transcription request timed out", retryable=True)
+        except requests.exceptions.ConnectionError as e:
+            raise TranscriptionError(f"Connection failed: {e}", retryable=True)
+
+        if response.status_code in RETRYABLE_STATUS:
+            raise TranscriptionError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                     retryable=True, status=response.status_code,
+                                     retry_after=_parse_retry_after(response.headers.get('Retry-After')))
+        if response.status_code != 200:
+            raise TranscriptionError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                     status=response.status_code)
+
+        try:
+            result = response.json()
+        except ValueError:
+            raise TranscriptionError(f"Invalid JSON from Space: {response.text[:200]}")
+        if not result.get('success'):
+            raise TranscriptionError(f"Transcription failed: {result}")
+        return result
+
+    def transcribe(self, source, filename, mime_type, on_progress=None):
+        """
+        Upload a file path or bytes to /transcribe and return the parsed JSON
+        response ({"success": true, "transcript": ..., maybe "segments"}).
+        """
+        upload = MultipartUpload(source, filename, mime_type)
+        attempt = 0
+        while True:
+            try:
+                return self._post_once(upload, on_progress)
+            except TranscriptionError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e.retry_after)
+                attempt += 1
+                print(f"Transient error ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s",
+                      file=sys.stderr)
+                time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+def _parse_retry_after(value):
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, so every caller shares the connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HFSpaceClient(pool_size=max(8, MAX_IN_FLIGHT))
+        return _client
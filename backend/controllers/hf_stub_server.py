@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Hugging Face transcription Space.
+
+Serves POST /transcribe with the same response shape as the real Space, and
+can inject failures and latency so retries, timeouts and concurrency can be
+tried without the network:
+
+    python hf_stub_server.py --port 7860 --fail-first 2 --delay 0.5
+    HF_SPACE_URL=http://127.0.0.1:7860 python transcribe_hf.py meeting.mp3
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, fail_first=0, fail_status=503, delay=0.0, retry_after=None, transcript=None):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.retry_after = retry_after
+        self.transcript = transcript
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_request(self):
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, {"status": "ok", "requests": self.server.state.requests})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/transcribe':
+            self._reply(404, {"error": "not found"})
+            return
+
+        # Both framings at once is a malformed request (RFC 9112 6.1); uvicorn
+        # and most proxies reject it, so the stub does too
+        if 'Transfer-Encoding' in self.headers and 'Content-Length' in self.headers:
+            self.close_connection = True
+            self._reply(400, {"error": "both Content-Length and Transfer-Encoding sent"})
+            return
+        if 'Content-Length' not in self.headers:
+            self.close_connection = True
+            self._reply(411, {"error": "Content-Length required"})
+            return
+
+        state = self.server.state
+        # Read the body in chunks, the way the real server would
+        remaining = int(self.headers.get('Content-Length', 0))
+        head = b''
+        size = 0
+        while remaining > 0:
+            chunk = self.rfile.read(min(65536, remaining))
+            if not chunk:
+                break
+            if len(head) < 4096:
+                head += chunk[:4096 - len(head)]
+            size += len(chunk)
+            remaining -= len(chunk)
+
+        number = state.next_request()
+        if state.delay:
+            time.sleep(state.delay)
+
+        if number <= state.fail_first:
+            headers = {'Retry-After': str(state.retry_after)} if state.retry_after is not None else None
+            self._reply(state.fail_status, {"error": f"injected failure {number}"}, headers)
+            return
+
+        match = re.search(rb'filename="([^"]*)"', head)
+        filename = match.group(1).decode('utf-8', 'replace') if match else 'upload'
+        transcript = state.transcript or f"Stub transcript of {filename} ({size} bytes)."
+        self._reply(200, {"success": True, "transcript": transcript,
+                          "segments": [{"start": 0.0, "end": 1.0, "text": transcript}]})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=7860, **options):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**options)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub HF transcription Space")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7860)
+    parser.add_argument('--fail-first', type=int, default=0, help="Fail the first N requests")
+    parser.add_argument('--fail-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=float, default=None, help="Retry-After seconds on failures")
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait before each reply")
+    parser.add_argument('--transcript', default=None, help="Fixed transcript text to return")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, fail_first=args.fail_first, fail_status=args.fail_status,
+                   delay=args.delay, retry_after=args.retry_after, transcript=args.transcript)
+    print(f"Stub Space listening on http://{args.host}:{args.port}/transcribe")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
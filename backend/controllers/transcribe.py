@@ -3,6 +3,11 @@ import os
 import subprocess
 import logging
 import json
+import argparse
+
+import whisper_daemon
+from chunking import ChunkedTranscriber
+from transcript_cache import TranscriptCache, CACHE_ENABLED
 
 # Paths
 BASE_DIR = os.path.dirname(__file__)
@@ -14,68 +19,229 @@ log_file = os.path.join(BASE_DIR, '..', 'transcribe_debug.log')
 logging.basicConfig(filename=log_file, level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Ensure audio file is provided
-if len(sys.argv) < 2:
-    logging.error("No audio file provided")
-    print(json.dumps({"error": "No audio file provided"}))
+# Set WHISPER_DAEMON=off to always use the whisper CLI
+USE_DAEMON = os.environ.get('WHISPER_DAEMON', 'on').lower() not in ('0', 'off', 'false', 'no')
+# Set WHISPER_CHUNKED=1 to always use parallel chunked transcription
+CHUNKED_DEFAULT = os.environ.get('WHISPER_CHUNKED', '').lower() in ('1', 'on', 'true', 'yes')
+
+
+class SegmentStream:
+    """Writes --stream output: one JSON line per segment, then a done line."""
+
+    def __init__(self):
+        self.emitted = 0
+
+    def write(self, message):
+        print(json.dumps(message), flush=True)
+
+    def segment(self, start, end, text):
+        self.write({"type": "segment", "start": start, "end": end, "text": text})
+        self.emitted += 1
+
+    def on_daemon_event(self, event):
+        if event.get('type') == 'segment':
+            self.segment(event['start'], event['end'], event['text'])
+
+    def restart(self, backend):
+        """Tell the reader to drop partial text before a fallback backend runs."""
+        if self.emitted:
+            self.write({"type": "restart", "backend": backend})
+            self.emitted = 0
+
+
+stream = None
+
+
+def fail(message):
+    logging.error(message)
+    if stream:
+        stream.write({"type": "error", "error": message})
+    else:
+        print(json.dumps({"error": message}))
     sys.exit(1)
 
-AUDIO_FILE = sys.argv[1]
-logging.info(f"Attempting to transcribe file: {AUDIO_FILE}")
 
-try:
-    # Check if audio file exists
-    if not os.path.exists(AUDIO_FILE):
-        logging.error(f"File {AUDIO_FILE} does not exist")
-        print(json.dumps({"error": f"File {AUDIO_FILE} does not exist"}))
-        sys.exit(1)
+def transcribe_with_daemon(audio_file, chunked=False):
+    """Send the job to the resident whisper daemon, starting it if needed."""
+    if not whisper_daemon.ensure_daemon():
+        logging.warning("Whisper daemon did not become ready")
+        return False
+    try:
+        whisper_daemon.request_transcription(
+            audio_file, TRANSCRIPTS_DIR, chunked=chunked, stream=bool(stream),
+            on_event=stream.on_daemon_event if stream else None)
+        return True
+    except (whisper_daemon.DaemonUnavailable, RuntimeError, OSError) as e:
+        logging.warning(f"Whisper daemon job failed: {e}")
+        return False
+
+
+def transcribe_chunked_locally(audio_file):
+    """Chunked transcription in this process, for when the daemon is off."""
+    transcriber = ChunkedTranscriber(whisper_daemon.MODEL_NAME)
+    try:
+        on_segment = (lambda seg: stream.segment(seg['start'], seg['end'], seg['text'])) if stream else None
+        segments = transcriber.transcribe(audio_file, whisper_daemon.LANGUAGE, on_segment=on_segment)
+        whisper_daemon.write_transcript(segments, audio_file, TRANSCRIPTS_DIR)
+        return True
+    except Exception as e:
+        logging.warning(f"Chunked transcription failed: {e}")
+        return False
+    finally:
+        transcriber.close()
 
-    # Whisper commands
+
+def transcribe_with_cli(audio_file):
+    """Fallback: shell out to the whisper CLI."""
+    model, language = whisper_daemon.MODEL_NAME, whisper_daemon.LANGUAGE
     commands = [
-        ["whisper", AUDIO_FILE, "--model", "base", "--language", "en", "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
-        ["openai-whisper", AUDIO_FILE, "--model", "base", "--language", "en", "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
-        ["python", "-m", "whisper", AUDIO_FILE, "--model", "base", "--language", "en", "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR]
+        ["whisper", audio_file, "--model", model, "--language", language, "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
+        ["openai-whisper", audio_file, "--model", model, "--language", language, "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR],
+        ["python", "-m", "whisper", audio_file, "--model", model, "--language", language, "--output_format", "txt", "--output_dir", TRANSCRIPTS_DIR]
     ]
 
-    success = False
     for cmd in commands:
         try:
             logging.info(f"Trying command: {' '.join(cmd)}")
             result = subprocess.run(cmd, capture_output=True, text=True)
             if result.returncode == 0:
-                success = True
-                break
+                return True
             logging.warning(f"Command failed: {result.stderr.strip()}")
         except Exception as e:
             logging.error(f"Error running command {cmd[0]}: {e}")
+    return False
+
 
-    if not success:
-        logging.error("All whisper commands failed")
-        print(json.dumps({"error": "Transcription failed"}))
-        sys.exit(1)
+class TranscriptionFailed(Exception):
+    pass
+
+
+def transcribe_file(audio_file, chunked=False):
+    """
+    Transcribe with the local Whisper backends (cache, daemon, chunked pool,
+    CLI) and return (transcript, transcript_file). Raises TranscriptionFailed.
+    """
+    # Check if audio file exists
+    if not os.path.exists(audio_file):
+        raise TranscriptionFailed(f"File {audio_file} does not exist")
 
     # Construct transcript file path
-    base_name = os.path.splitext(os.path.basename(AUDIO_FILE))[0]
+    base_name = os.path.splitext(os.path.basename(audio_file))[0]
     transcript_file = os.path.join(TRANSCRIPTS_DIR, f"{base_name}.txt")
 
+    # Look the audio up in the content-addressed cache first
+    cache, cache_key, cached = None, None, None
+    if CACHE_ENABLED:
+        try:
+            cache = TranscriptCache()
+            cache_key = cache.key_for(audio_file, whisper_daemon.MODEL_NAME, whisper_daemon.LANGUAGE)
+            cached = cache.get(cache_key)
+        except OSError as e:
+            logging.warning(f"Transcript cache unavailable: {e}")
+            cache = None
+
+    if cached is not None:
+        logging.info(f"Using cached transcript for {audio_file}")
+        with open(transcript_file, "w", encoding="utf-8", newline="") as f:
+            f.write(cached)
+    else:
+        success = USE_DAEMON and transcribe_with_daemon(audio_file, chunked)
+        if not success and chunked:
+            if stream:
+                stream.restart("chunked")
+            success = transcribe_chunked_locally(audio_file)
+        if not success:
+            if stream:
+                stream.restart("cli")
+            success = transcribe_with_cli(audio_file)
+
+        if not success:
+            logging.error("All whisper backends failed")
+            raise TranscriptionFailed("Transcription failed")
+
     if not os.path.exists(transcript_file):
-        logging.error(f"Transcript file {transcript_file} not found after whisper run")
-        print(json.dumps({"error": f"Transcript file {transcript_file} not found"}))
-        sys.exit(1)
+        raise TranscriptionFailed(f"Transcript file {transcript_file} not found")
 
     # Read transcript
-    with open(transcript_file, "r", encoding="utf-8") as f:
-        transcript = f.read().strip()
+    with open(transcript_file, "r", encoding="utf-8", newline="") as f:
+        contents = f.read()
+    transcript = contents.strip()
 
     if not transcript:
-        logging.error(f"Transcript file {transcript_file} is empty")
-        print(json.dumps({"error": f"Transcript file {transcript_file} is empty"}))
-        sys.exit(1)
+        raise TranscriptionFailed(f"Transcript file {transcript_file} is empty")
+
+    if cache and cached is None:
+        try:
+            cache.put(cache_key, contents)
+        except OSError as e:
+            logging.warning(f"Failed to write transcript cache: {e}")
+
+    return transcript, transcript_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe an audio file with Whisper")
+    parser.add_argument("audio_file", nargs="?")
+    parser.add_argument("--chunked", action="store_true", default=CHUNKED_DEFAULT,
+                        help="Split long audio into overlapping windows and transcribe them in parallel")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print one JSON line per segment as it is decoded, then a done line")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="Transcribe every audio file in a directory or manifest")
+    parser.add_argument("--concurrency", type=int, default=None, help="Batch jobs in flight")
+    parser.add_argument("--results", default=None, help="Batch results manifest (JSON Lines)")
+    parser.add_argument("--backend", default="auto", choices=["auto", "local", "hf"],
+                        help="Batch backend; auto routes each file to the fastest healthy one")
+    args = parser.parse_args()
+
+    if args.batch:
+        # Imported here: the batch runner goes through the router, which imports this module
+        import transcribe_batch
+        if not os.path.exists(args.batch):
+            fail(f"Batch source {args.batch} does not exist")
+        summary = transcribe_batch.run_batch(
+            args.batch, args.concurrency or transcribe_batch.DEFAULT_CONCURRENCY,
+            args.results, args.backend)
+        print(json.dumps(summary))
+        sys.exit(0 if summary["error"] == 0 else 1)
+
+    global stream
+    if args.stream:
+        stream = SegmentStream()
+
+    # Ensure audio file is provided
+    if not args.audio_file:
+        fail("No audio file provided")
+
+    audio_file = args.audio_file
+    logging.info(f"Attempting to transcribe file: {audio_file}")
+
+    try:
+        try:
+            transcript, transcript_file = transcribe_file(audio_file, args.chunked)
+        except TranscriptionFailed as e:
+            fail(str(e))
+
+        if stream:
+            # Cache hits and the CLI fallback only produce the finished file
+            if not stream.emitted:
+                for line in transcript.splitlines():
+                    stream.segment(None, None, line.strip())
+            stream.write({"type": "done", "transcript_file": transcript_file, "transcript": transcript})
+        else:
+            # Output JSON
+            print(transcript)
+        logging.info(f"Successfully transcribed {audio_file} to {transcript_file}")
+
+    except SystemExit:
+        raise
+    except Exception as e:
+        logging.error(f"Unexpected error: {e}")
+        if stream:
+            stream.write({"type": "error", "error": f"Unexpected error: {e}"})
+        else:
+            print(json.dumps({"error": f"Unexpected error: {e}"}))
 
-    # Output JSON
-    print(transcript)
-    logging.info(f"Successfully transcribed {AUDIO_FILE} to {transcript_file}")
 
-except Exception as e:
-    logging.error(f"Unexpected error: {e}")
-    print(json.dumps({"error": f"Unexpected error: {e}"}))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Batch transcription for backfilling archives of recordings.
+
+    python transcribe.py --batch <directory | manifest> [--concurrency N]
+
+A manifest is a text file with one audio path per line, or JSON Lines with
+an "audio" key. Files are routed through transcribe_router with at most N
+jobs in flight. Each finished file appends one line to the results manifest
+(TRANSCRIPTS_DIR/batch_results.jsonl by default) with its status, backend,
+timing and error. A file whose transcript already exists in TRANSCRIPTS_DIR
+is skipped, so an interrupted run can simply be started again.
+
+Transcripts are named after the audio file's basename (that is what every
+backend writes), so files with the same basename in different folders
+(2023/standup.mp3, 2024/standup.mp3) would overwrite each other and fool
+the resume check. They are reported as errors up front and not
+transcribed; rename them and run the batch again.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import transcribe
+import transcribe_router
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.mp4', '.ogg', '.oga', '.opus', '.webm',
+                    '.flac', '.aac', '.wma', '.mkv', '.mov', '.3gp'}
+DEFAULT_CONCURRENCY = int(os.environ.get('TRANSCRIBE_BATCH_CONCURRENCY', '2'))
+
+logger = logging.getLogger("transcribe_batch")
+
+
+def collect_inputs(source):
+    """Audio paths from a directory (recursive) or a manifest file."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = json.loads(line)['audio'] if line.startswith('{') else line
+            # Relative entries are relative to the manifest
+            paths.append(path if os.path.isabs(path) else os.path.join(base_dir, path))
+    return paths
+
+
+def transcript_path(audio_file):
+    base_name = os.path.splitext(os.path.basename(audio_file))[0]
+    return os.path.join(transcribe.TRANSCRIPTS_DIR, f"{base_name}.txt")
+
+
+def already_done(audio_file):
+    path = transcript_path(audio_file)
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def find_collisions(inputs):
+    """Map audio path -> the other inputs that would write the same transcript."""
+    by_transcript = defaultdict(list)
+    for audio_file in inputs:
+        by_transcript[transcript_path(audio_file)].append(audio_file)
+    return {audio_file: [other for other in group if other != audio_file]
+            for group in by_transcript.values() if len(group) > 1 for audio_file in group}
+
+
+class ResultsWriter:
+    """Appends one JSON line per file; safe to call from worker threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        record = {**record, "finished_at": datetime.now(timezone.utc).isoformat()}
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def transcribe_one(audio_file, backend):
+    started = time.perf_counter()
+    record = {"audio": audio_file, "transcript_file": transcript_path(audio_file)}
+    try:
+        if not os.path.exists(audio_file):
+            raise transcribe.TranscriptionFailed(f"File {audio_file} does not exist")
+        if backend == "auto":
+            _, used = transcribe_router.route(audio_file)
+        else:
+            transcribe_router.BACKENDS[backend](audio_file, None)
+            used = backend
+        record.update(status="ok", backend=used)
+    except Exception as e:
+        logger.error(f"Batch item {audio_file} failed: {e}")
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run_batch(source, concurrency=DEFAULT_CONCURRENCY, results_path=None, backend="auto"):
+    """Transcribe every file under source and return a summary dict."""
+    # A file listed twice is one job, not a collision
+    inputs = list(dict.fromkeys(os.path.normpath(path) for path in collect_inputs(source)))
+    results = ResultsWriter(results_path or os.path.join(transcribe.TRANSCRIPTS_DIR, 'batch_results.jsonl'))
+    summary = {"total": len(inputs), "ok": 0, "skipped": 0, "error": 0, "results": results.path}
+
+    collisions = find_collisions(inputs)
+    todo = []
+    for audio_file in inputs:
+        if audio_file in collisions:
+            summary["error"] += 1
+            results.write({"audio": audio_file, "transcript_file": transcript_path(audio_file), "status": "error",
+                           "error": f"Same transcript name as {', '.join(collisions[audio_file])}; rename one of them",
+                           "seconds": 0})
+        elif already_done(audio_file):
+            summary["skipped"] += 1
+            results.write({"audio": audio_file, "transcript_file": transcript_path(audio_file),
+                           "status": "skipped", "seconds": 0})
+        else:
+            todo.append(audio_file)
+
+    if collisions:
+        logger.error(f"Batch {source}: {len(collisions)} files share a transcript name and were not transcribed")
+    logger.info(f"Batch {source}: {len(todo)} to transcribe, {summary['skipped']} already done")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(transcribe_one, audio_file, backend) for audio_file in todo]
+        for future in as_completed(futures):
+            record = future.result()
+            results.write(record)
+            summary[record["status"]] += 1
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
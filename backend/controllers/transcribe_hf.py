@@ -4,80 +4,217 @@ Transcription service using Hugging Face Spaces API
 """
 import os
 import sys
-import requests
 import json
+import mimetypes
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-def transcribe_with_huggingface(audio_file_path):
+from transcript_cache import TranscriptCache, CACHE_ENABLED
+from audio_preprocess import encode_opus, describe, PreprocessError
+from hf_client import get_client, TranscriptionError, MAX_IN_FLIGHT
+from chunking import probe_duration, plan_windows, drop_repeated_prefix
+
+# The Space picks its own model; the language only feeds the cache key
+HF_LANGUAGE = os.environ.get('HF_LANGUAGE', 'auto')
+# 'opus' re-encodes uploads to compact mono Opus first; 'raw' sends the original file
+HF_UPLOAD_FORMAT = os.environ.get('HF_UPLOAD_FORMAT', 'opus')
+# Segmented mode (--segmented or HF_SEGMENTED=1) for long recordings
+HF_SEGMENTED = os.environ.get('HF_SEGMENTED', '').lower() in ('1', 'on', 'true', 'yes')
+HF_SEGMENT_SECONDS = float(os.environ.get('HF_SEGMENT_SECONDS', '300'))
+HF_SEGMENT_OVERLAP = float(os.environ.get('HF_SEGMENT_OVERLAP', '2'))
+# Extra rounds for segments that still fail after the client's own retries
+HF_SEGMENT_RETRIES = int(os.environ.get('HF_SEGMENT_RETRIES', '2'))
+
+def get_space_url():
+    """Return the /transcribe endpoint of the configured HF Space"""
+    return get_client().url
+
+def prepare_upload(audio_file_path):
+    """
+    Return (filename, data, mime type) for the upload. data is None when the
+    original file should be sent as-is.
+    """
+    if HF_UPLOAD_FORMAT == 'opus':
+        try:
+            data, stats = encode_opus(audio_file_path)
+            print(f"Preprocessed audio: {describe(stats)}", file=sys.stderr)
+            return f"{Path(audio_file_path).stem}.ogg", data, 'audio/ogg'
+        except PreprocessError as e:
+            print(f"Opus preprocessing failed, uploading original file: {e}", file=sys.stderr)
+    
+    mime_type = mimetypes.guess_type(audio_file_path)[0] or 'application/octet-stream'
+    return os.path.basename(audio_file_path), None, mime_type
+
+def transcribe_with_huggingface(audio_file_path, on_segment=None):
     """
     Transcribe audio using your Hugging Face Space
+
+    on_segment(start, end, text) is called for each segment in the response.
     """
     try:
-        # Get HF Space URL from environment variable
-        space_url = os.environ.get('HF_SPACE_URL', 'https://aseshasayee1-whisper-transcriber.hf.space')
-        if not space_url.endswith('/transcribe'):
-            space_url = f"{space_url}/transcribe"
-        
-        # Get HF token for private spaces
-        hf_token = os.environ.get('HUGGINGFACE_TOKEN')
+        client = get_client()
         
         # Check if file exists
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         
         print(f"Transcribing file: {audio_file_path}", file=sys.stderr)
-        print(f"Using HF Space URL: {space_url}", file=sys.stderr)
-        
-        # Prepare headers for private spaces
-        headers = {}
-        if hf_token:
-            headers['Authorization'] = f'Bearer {hf_token}'
+        print(f"Using HF Space URL: {client.url}", file=sys.stderr)
         
-        # Prepare file for upload
-        with open(audio_file_path, 'rb') as f:
-            files = {'file': (os.path.basename(audio_file_path), f, 'audio/mpeg')}
-            
-            # Make request to your HF Space
-            response = requests.post(space_url, files=files, headers=headers, timeout=300)
+        # Prepare file for upload; the original file is streamed from disk
+        filename, data, mime_type = prepare_upload(audio_file_path)
+        source = data if data is not None else audio_file_path
+        result = client.transcribe(source, filename, mime_type, on_progress=UploadProgress())
         
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                print("Transcription successful", file=sys.stderr)
-                return result['transcript'].strip()
-            else:
-                raise Exception(f"Transcription failed: {result}")
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+        print("Transcription successful", file=sys.stderr)
+        transcript = result['transcript'].strip()
+        if on_segment:
+            # The Space may or may not return timestamps
+            segments = result.get('segments') or [{"start": None, "end": None, "text": transcript}]
+            for segment in segments:
+                on_segment(segment.get('start'), segment.get('end'), segment['text'].strip())
+        return transcript
             
-    except requests.exceptions.Timeout:
-        raise Exception("Transcription request timed out")
-    except requests.exceptions.RequestException as e:
+    except TranscriptionError as e:
         raise Exception(f"Request failed: {str(e)}")
     except Exception as e:
         raise Exception(f"Transcription error: {str(e)}")
 
+def transcribe_segmented(audio_file_path, on_segment=None, segment_seconds=HF_SEGMENT_SECONDS,
+                         overlap=HF_SEGMENT_OVERLAP, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Slice the audio into overlapping segments, upload them concurrently and
+    join the text in order. Failed segments are retried on their own.
+    """
+    client = get_client()
+    windows = plan_windows(probe_duration(audio_file_path), segment_seconds, overlap)
+    stem = Path(audio_file_path).stem
+    print(f"Uploading {len(windows)} segments to {client.url}, {max_in_flight} in flight", file=sys.stderr)
+    
+    def transcribe_window(index):
+        start, end = windows[index]
+        # ffmpeg seeks to the window, so each worker encodes only its slice
+        data, _ = encode_opus(audio_file_path, start, end - start)
+        result = client.transcribe(data, f"{stem}-{index:04d}.ogg", 'audio/ogg')
+        return result['transcript'].strip()
+    
+    texts = [None] * len(windows)
+    pending = list(range(len(windows)))
+    emitted = 0
+    merged = ""
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for round_number in range(HF_SEGMENT_RETRIES + 1):
+            futures = {index: pool.submit(transcribe_window, index) for index in pending}
+            failed = []
+            for index in pending:
+                try:
+                    texts[index] = futures[index].result()
+                except Exception as e:
+                    print(f"Segment {index} failed: {e}", file=sys.stderr)
+                    failed.append(index)
+                    continue
+                # Emit the longest finished prefix, in order
+                while emitted < len(texts) and texts[emitted] is not None:
+                    text = drop_repeated_prefix(merged, texts[emitted]) if merged else texts[emitted]
+                    merged = f"{merged} {text}".strip()
+                    if on_segment and text:
+                        on_segment(windows[emitted][0], windows[emitted][1], text)
+                    emitted += 1
+            if not failed:
+                break
+            pending = failed
+            if round_number < HF_SEGMENT_RETRIES:
+                print(f"Retrying {len(failed)} failed segments", file=sys.stderr)
+        else:
+            raise Exception(f"{len(pending)} of {len(windows)} segments failed")
+    
+    print("Transcription successful", file=sys.stderr)
+    return merged
+
+class UploadProgress:
+    """Logs upload progress to stderr in 25% steps"""
+    def __init__(self):
+        self.reported = 0
+    
+    def __call__(self, sent, total):
+        percent = int(sent * 100 / total) if total else 100
+        if percent >= self.reported + 25 or (percent == 100 and self.reported < 100):
+            self.reported = percent
+            print(f"Uploaded {percent}% ({sent}/{total} bytes)", file=sys.stderr)
+
+def transcribe_file(audio_file_path, on_segment=None, segmented=HF_SEGMENTED):
+    """
+    Transcribe through the Space, reusing an earlier transcript of the same
+    audio if the cache has one.
+    """
+    cache, cache_key = None, None
+    if CACHE_ENABLED:
+        try:
+            cache = TranscriptCache()
+            cache_key = cache.key_for(audio_file_path, f"hf-space:{get_space_url()}", HF_LANGUAGE)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("Using cached transcript", file=sys.stderr)
+                if on_segment:
+                    on_segment(None, None, cached)
+                return cached
+        except OSError as e:
+            print(f"Transcript cache unavailable: {e}", file=sys.stderr)
+            cache = None
+    
+    if segmented:
+        transcript = transcribe_segmented(audio_file_path, on_segment)
+    else:
+        transcript = transcribe_with_huggingface(audio_file_path, on_segment)
+    
+    if cache and transcript:
+        try:
+            cache.put(cache_key, transcript)
+        except OSError as e:
+            print(f"Failed to write transcript cache: {e}", file=sys.stderr)
+    return transcript
+
+def emit_json_line(message):
+    print(json.dumps(message), flush=True)
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python transcribe_hf.py <audio_file_path>")
+    args = sys.argv[1:]
+    # --stream prints one JSON line per segment, then a done line
+    stream = '--stream' in args
+    segmented = HF_SEGMENTED or '--segmented' in args
+    args = [arg for arg in args if arg not in ('--stream', '--segmented')]
+    if len(args) != 1:
+        print("Usage: python transcribe_hf.py [--stream] [--segmented] <audio_file_path>")
         sys.exit(1)
     
-    audio_file_path = sys.argv[1]
+    audio_file_path = args[0]
     
     if not os.path.exists(audio_file_path):
-        print(f"Error: Audio file not found: {audio_file_path}")
+        if stream:
+            emit_json_line({"type": "error", "error": f"Audio file not found: {audio_file_path}"})
+        else:
+            print(f"Error: Audio file not found: {audio_file_path}")
         sys.exit(1)
     
+    def on_segment(start, end, text):
+        emit_json_line({"type": "segment", "start": start, "end": end, "text": text})
+    
     try:
         # Transcribe the audio
-        transcript = transcribe_with_huggingface(audio_file_path)
+        transcript = transcribe_file(audio_file_path, on_segment if stream else None, segmented)
         
         # Output the transcript
-        print(transcript)
+        if stream:
+            emit_json_line({"type": "done", "transcript": transcript})
+        else:
+            print(transcript)
         sys.exit(0)
         
     except Exception as e:
-        print(f"Transcription failed: {str(e)}")
+        if stream:
+            emit_json_line({"type": "error", "error": f"Transcription failed: {str(e)}"})
+        else:
+            print(f"Transcription failed: {str(e)}")
         sys.exit(1)
 
 if __name__ == "__main__":
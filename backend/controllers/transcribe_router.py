@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Single transcription entry point that routes each file to the best backend.
+
+Backends:
+    local  - Whisper via the resident daemon (transcribe.py)
+    hf     - the Hugging Face Space (transcribe_hf.py)
+
+For every backend the router keeps the last few (size, seconds) samples and
+outcomes in a small JSON state file, so the history survives between the
+short-lived processes server.js starts. Each job goes to the backend with
+the lowest predicted latency for this file size, where the prediction is
+inflated by the backend's recent error rate. After repeated failures a
+backend's circuit opens and it is skipped until a cooldown expires. Then
+one trial request is let through (half-open); success closes the circuit
+again.
+
+Usage matches transcribe.py: the transcript goes to stdout, and --stream
+emits JSON Lines.
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from contextlib import contextmanager
+
+import transcribe
+from transcribe import SegmentStream, TranscriptionFailed
+
+try:
+    import fcntl
+except ImportError:  # Windows: state updates are best effort
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.environ.get('TRANSCRIBE_ROUTER_STATE',
+                            os.path.join(BASE_DIR, '..', 'transcribe_router_state.json'))
+# Order used to break ties and to try backends that have no history yet
+BACKEND_PRIORITY = [b.strip() for b in os.environ.get('TRANSCRIBE_BACKENDS', 'hf,local').split(',') if b.strip()]
+SAMPLE_WINDOW = 20
+CIRCUIT_FAILURES = int(os.environ.get('ROUTER_CIRCUIT_FAILURES', '3'))
+CIRCUIT_COOLDOWN = float(os.environ.get('ROUTER_CIRCUIT_COOLDOWN', '60'))
+CIRCUIT_MAX_COOLDOWN = float(os.environ.get('ROUTER_CIRCUIT_MAX_COOLDOWN', '900'))
+# Files above this size go to the Space as concurrent segments
+HF_SEGMENT_MIN_MB = float(os.environ.get('HF_SEGMENT_MIN_MB', '20'))
+# Files above this size are transcribed locally in parallel chunks
+LOCAL_CHUNKED_MIN_MB = float(os.environ.get('LOCAL_CHUNKED_MIN_MB', '20'))
+
+logger = logging.getLogger("transcribe_router")
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+def run_local(audio_file, on_segment):
+    # transcribe.py reports segments through its module-level stream
+    chunked = transcribe.CHUNKED_DEFAULT or os.path.getsize(audio_file) >= LOCAL_CHUNKED_MIN_MB * 1e6
+    transcript, _ = transcribe.transcribe_file(audio_file, chunked)
+    return transcript
+
+
+def run_hf(audio_file, on_segment):
+    import transcribe_hf
+    segmented = transcribe_hf.HF_SEGMENTED or os.path.getsize(audio_file) >= HF_SEGMENT_MIN_MB * 1e6
+    transcript = transcribe_hf.transcribe_file(audio_file, on_segment, segmented)
+    if not transcript:
+        raise TranscriptionFailed("Empty transcript from HF Space")
+    # Keep TRANSCRIPTS_DIR/<name>.txt populated whichever backend ran
+    base_name = os.path.splitext(os.path.basename(audio_file))[0]
+    with open(os.path.join(transcribe.TRANSCRIPTS_DIR, f"{base_name}.txt"), "w", encoding="utf-8") as f:
+        f.write(transcript + "\n")
+    return transcript
+
+
+BACKENDS = {
+    "local": run_local,
+    "hf": run_hf,
+}
+
+
+# ---------------------------------------------------------------------------
+# Health state
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def locked_state(path=STATE_FILE):
+    """Load the state file under an exclusive lock and write it back on exit."""
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (FileNotFoundError, ValueError):
+                state = {}
+            yield state
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _backend_state(state, name):
+    return state.setdefault(name, {
+        "samples": [],          # [size_mb, seconds] of recent successes
+        "outcomes": [],         # 1 = success, 0 = failure
+        "consecutive_failures": 0,
+        "open_until": 0,
+        "cooldown": CIRCUIT_COOLDOWN,
+    })
+
+
+def circuit_status(backend, now=None):
+    now = now or time.time()
+    if backend["consecutive_failures"] < CIRCUIT_FAILURES:
+        return "closed"
+    return "open" if now < backend["open_until"] else "half-open"
+
+
+def predict_seconds(backend, size_mb):
+    """Least-squares fit of seconds = a + b * size over recent samples."""
+    samples = backend["samples"]
+    if not samples:
+        return None
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+    if var_x < 1e-9:
+        # All samples at one size: scale by throughput instead
+        return mean_y * (size_mb / mean_x) if mean_x > 0 else mean_y
+    slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x)
+    return max(0.0, mean_y - slope * mean_x) + slope * size_mb
+
+
+def error_rate(backend):
+    outcomes = backend["outcomes"]
+    return (outcomes.count(0) / len(outcomes)) if outcomes else 0.0
+
+
+def rank_backends(state, size_mb, now=None):
+    """Return usable backend names, best first."""
+    ranked = []
+    for priority, name in enumerate(BACKEND_PRIORITY):
+        if name not in BACKENDS:
+            continue
+        backend = _backend_state(state, name)
+        if circuit_status(backend, now) == "open":
+            continue
+        predicted = predict_seconds(backend, size_mb)
+        if predicted is not None:
+            # Expected cost including the failures we will have to sit through
+            predicted /= max(0.05, 1.0 - error_rate(backend))
+        # Backends without history are tried first so they get measured
+        ranked.append(((predicted is not None, predicted or 0.0, priority), name))
+    return [name for _, name in sorted(ranked)]
+
+
+def record_result(name, size_mb, seconds, ok):
+    with locked_state() as state:
+        backend = _backend_state(state, name)
+        backend["outcomes"] = (backend["outcomes"] + [1 if ok else 0])[-SAMPLE_WINDOW:]
+        if ok:
+            backend["samples"] = (backend["samples"] + [[size_mb, seconds]])[-SAMPLE_WINDOW:]
+            backend["consecutive_failures"] = 0
+            backend["cooldown"] = CIRCUIT_COOLDOWN
+            return
+        backend["consecutive_failures"] += 1
+        if backend["consecutive_failures"] >= CIRCUIT_FAILURES:
+            # A failed half-open trial reopens the circuit for longer
+            if backend["consecutive_failures"] > CIRCUIT_FAILURES:
+                backend["cooldown"] = min(CIRCUIT_MAX_COOLDOWN, backend["cooldown"] * 2)
+            backend["open_until"] = time.time() + backend["cooldown"]
+            logger.warning(f"Circuit open for backend '{name}' for {backend['cooldown']:.0f}s")
+
+
+def route(audio_file, stream=None):
+    """Transcribe audio_file with the best available backend, falling back in rank order."""
+    size_mb = os.path.getsize(audio_file) / 1e6
+    with locked_state() as state:
+        order = rank_backends(state, size_mb)
+        # Claim half-open trials so concurrent jobs don't all probe a sick backend
+        for name in order:
+            backend = _backend_state(state, name)
+            if circuit_status(backend) == "half-open":
+                backend["open_until"] = time.time() + backend["cooldown"]
+    if not order:
+        raise TranscriptionFailed("All transcription backends are unavailable (circuits open)")
+
+    on_segment = stream.segment if stream else None
+    errors = []
+    for name in order:
+        if stream:
+            stream.restart(name)
+        logger.info(f"Routing {audio_file} ({size_mb:.1f} MB) to backend '{name}'")
+        started = time.perf_counter()
+        try:
+            transcript = BACKENDS[name](audio_file, on_segment)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            logger.warning(f"Backend '{name}' failed after {elapsed:.1f}s: {e}")
+            record_result(name, size_mb, elapsed, ok=False)
+            errors.append(f"{name}: {e}")
+            continue
+        elapsed = time.perf_counter() - started
+        record_result(name, size_mb, elapsed, ok=True)
+        logger.info(f"Backend '{name}' transcribed {audio_file} in {elapsed:.1f}s")
+        return transcript, name
+    raise TranscriptionFailed("; ".join(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe an audio file with the fastest healthy backend")
+    parser.add_argument("audio_file", nargs="?")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print one JSON line per segment as it is decoded, then a done line")
+    parser.add_argument("--status", action="store_true", help="Print backend health and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        with locked_state() as state:
+            print(json.dumps({name: {**_backend_state(state, name),
+                                     "circuit": circuit_status(_backend_state(state, name)),
+                                     "error_rate": error_rate(_backend_state(state, name))}
+                              for name in BACKEND_PRIORITY if name in BACKENDS}, indent=2))
+        return
+
+    stream = SegmentStream() if args.stream else None
+    # local backend segments go through transcribe.py's stream
+    transcribe.stream = stream
+
+    if not args.audio_file:
+        transcribe.fail("No audio file provided")
+    if not os.path.exists(args.audio_file):
+        transcribe.fail(f"File {args.audio_file} does not exist")
+
+    try:
+        transcript, backend = route(args.audio_file, stream)
+    except TranscriptionFailed as e:
+        transcribe.fail(f"Transcription failed: {e}")
+
+    if stream:
+        if not stream.emitted:
+            for line in transcript.splitlines():
+                stream.segment(None, None, line.strip())
+        stream.write({"type": "done", "backend": backend, "transcript": transcript})
+    else:
+        print(transcript)
+
+
+if __name__ == "__main__":
+    main()
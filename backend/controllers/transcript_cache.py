@@ -0,0 +1,97 @@
+"""
+Content-addressed transcript cache shared by transcribe.py and transcribe_hf.py.
+
+Entries are keyed by the SHA-256 of the audio bytes plus the model name and
+language, so the same recording uploaded under a different name is only
+transcribed once per configuration. The cache is a directory of text files;
+file mtimes track recency and the oldest entries are evicted once the total
+size goes over the cap.
+"""
+import os
+import hashlib
+import logging
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('TRANSCRIPT_CACHE_DIR', os.path.join(BASE_DIR, '..', 'transcript_cache'))
+CACHE_MAX_BYTES = int(float(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', '200')) * 1024 * 1024)
+# Set TRANSCRIPT_CACHE=off to disable lookups and writes
+CACHE_ENABLED = os.environ.get('TRANSCRIPT_CACHE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+logger = logging.getLogger("transcript_cache")
+
+
+def audio_digest(audio_path, chunk_size=1024 * 1024):
+    """SHA-256 of the audio file contents."""
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(digest, model, language):
+    return hashlib.sha256(f"{digest}\0{model}\0{language}".encode('utf-8')).hexdigest()
+
+
+class TranscriptCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def key_for(self, audio_path, model, language):
+        return cache_key(audio_digest(audio_path), model, language)
+
+    def get(self, key):
+        """Return the cached transcript text, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        logger.info(f"Transcript cache hit: {key}")
+        return text
+
+    def put(self, key, text):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits the cap."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.txt'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted transcript cache entry {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Resident Whisper transcription daemon.
+
+Loads the Whisper model once and serves transcription jobs over a local TCP
+socket (or stdin/stdout with --stdio) using a JSON Lines protocol:
+
+    request:  {"op": "transcribe", "audio": "<path>", "output_dir": "<dir>",
+               "chunked": false, "stream": false}
+    replies:  {"type": "segment", "start": 0.0, "end": 4.2, "text": "..."}
+              {"type": "done", "transcript_file": "<path>", "text": "..."}
+              {"type": "error", "error": "..."}
+
+    request:  {"op": "ping"}
+    reply:    {"type": "pong", "model": "base", "language": "en"}
+
+transcribe.py talks to this process through request_transcription().
+"""
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import subprocess
+import socketserver
+
+from chunking import ChunkedTranscriber, transcribe_streaming
+from audio_preprocess import decode_pcm, describe
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSCRIPTS_DIR = os.path.join(BASE_DIR, '..', 'transcripts')
+
+DAEMON_HOST = os.environ.get('WHISPER_DAEMON_HOST', '127.0.0.1')
+DAEMON_PORT = int(os.environ.get('WHISPER_DAEMON_PORT', '5002'))
+MODEL_NAME = os.environ.get('WHISPER_MODEL', 'base')
+LANGUAGE = os.environ.get('WHISPER_LANGUAGE', 'en')
+# How long a caller waits for a freshly started daemon to load the model
+# before falling back to the CLI for this job
+START_TIMEOUT = float(os.environ.get('WHISPER_DAEMON_START_TIMEOUT', '30'))
+
+logger = logging.getLogger("whisper_daemon")
+
+
+def write_transcript(segments, audio_path, output_dir):
+    """Write segments the same way `whisper --output_format txt` does."""
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    transcript_file = os.path.join(output_dir, f"{base_name}.txt")
+    with open(transcript_file, "w", encoding="utf-8") as f:
+        for segment in segments:
+            print(segment['text'].strip(), file=f, flush=True)
+    return transcript_file
+
+
+class WhisperWorker:
+    """Holds the loaded model and serializes access to it."""
+
+    def __init__(self, model_name=MODEL_NAME, language=LANGUAGE, chunk_workers=None):
+        self.model_name = model_name
+        self.language = language
+        self.model = None
+        self._lock = threading.Lock()
+        # Process pool for long recordings, started on the first chunked job
+        self.chunked = ChunkedTranscriber(model_name, chunk_workers)
+
+    def load(self):
+        import whisper
+        started = time.perf_counter()
+        self.model = whisper.load_model(self.model_name)
+        logger.info(f"Loaded whisper model '{self.model_name}' in {time.perf_counter() - started:.2f}s")
+
+    def transcribe(self, job, emit):
+        audio_path = job['audio']
+        output_dir = job.get('output_dir') or TRANSCRIPTS_DIR
+        language = job.get('language') or self.language
+
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"File {audio_path} does not exist")
+
+        started = time.perf_counter()
+        if job.get('chunked'):
+            segments = self.chunked.transcribe(
+                audio_path, language,
+                on_segment=lambda s: emit({"type": "segment", **s}))
+        elif job.get('stream'):
+            # Short sequential windows, so segments go out while decoding
+            with self._lock:
+                segments = transcribe_streaming(
+                    self.model, audio_path, language,
+                    on_segment=lambda s: emit({"type": "segment", **s}))
+        else:
+            # Normalize once here so Whisper skips its own ffmpeg decode
+            audio, stats = decode_pcm(audio_path)
+            logger.info(f"Preprocessed {audio_path}: {describe(stats)}")
+            with self._lock:
+                result = self.model.transcribe(audio, language=language, fp16=False)
+            segments = result.get('segments', [])
+            for segment in segments:
+                emit({"type": "segment", "start": segment['start'], "end": segment['end'],
+                      "text": segment['text'].strip()})
+
+        transcript_file = write_transcript(segments, audio_path, output_dir)
+        logger.info(f"Transcribed {audio_path} in {time.perf_counter() - started:.2f}s")
+        return {"transcript_file": transcript_file,
+                "text": "\n".join(s['text'].strip() for s in segments)}
+
+    def handle(self, job, emit):
+        op = job.get('op', 'transcribe')
+        if op == 'ping':
+            emit({"type": "pong", "model": self.model_name, "language": self.language})
+            return
+        if op != 'transcribe':
+            emit({"type": "error", "error": f"Unknown op: {op}"})
+            return
+        try:
+            done = self.transcribe(job, emit)
+            emit({"type": "done", **done})
+        except Exception as e:
+            logger.error(f"Job failed for {job.get('audio')}: {e}")
+            emit({"type": "error", "error": str(e)})
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        def emit(message):
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({"type": "error", "error": f"Invalid request: {e}"})
+            return
+        self.server.worker.handle(job, emit)
+
+
+class _DaemonServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve_socket(worker, host=DAEMON_HOST, port=DAEMON_PORT):
+    with _DaemonServer((host, port), _JobHandler) as server:
+        server.worker = worker
+        logger.info(f"Whisper daemon listening on {host}:{port}")
+        server.serve_forever()
+
+
+def serve_stdio(worker):
+    def emit(message):
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({"type": "error", "error": f"Invalid request: {e}"})
+            continue
+        worker.handle(job, emit)
+
+
+# ---------------------------------------------------------------------------
+# Client helpers (used by transcribe.py)
+# ---------------------------------------------------------------------------
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+def _send(message, timeout=None, host=DAEMON_HOST, port=DAEMON_PORT):
+    """Send one request and yield each JSON reply line."""
+    try:
+        sock = socket.create_connection((host, port), timeout=2)
+    except OSError as e:
+        raise DaemonUnavailable(str(e))
+    with sock:
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def ping(host=DAEMON_HOST, port=DAEMON_PORT):
+    try:
+        for reply in _send({"op": "ping"}, timeout=2, host=host, port=port):
+            return reply.get('type') == 'pong'
+    except (DaemonUnavailable, OSError, ValueError):
+        return False
+    return False
+
+
+def ensure_daemon(start_timeout=START_TIMEOUT):
+    """
+    Start the daemon in the background if it is not already running.
+    Returns False as soon as the new process exits (e.g. whisper is not
+    installed) or start_timeout passes; a daemon still loading keeps
+    starting up and serves later jobs.
+    """
+    if ping():
+        return True
+
+    log_path = os.path.join(BASE_DIR, '..', 'whisper_daemon.log')
+    logger.info("Whisper daemon not running, starting it")
+    with open(log_path, "a") as log:
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                stdout=log, stderr=log, stdin=subprocess.DEVNULL,
+                                start_new_session=True)
+
+    deadline = time.monotonic() + start_timeout
+    while time.monotonic() < deadline:
+        if ping():
+            return True
+        if proc.poll() is not None:
+            # Died during start-up, or lost the port to a daemon another caller started
+            logger.warning(f"Whisper daemon exited with code {proc.returncode}, see {log_path}")
+            return ping()
+        time.sleep(0.5)
+    return False
+
+
+def request_transcription(audio_path, output_dir=TRANSCRIPTS_DIR, on_event=None, timeout=None, **options):
+    """Run a transcription job on the daemon and return the 'done' message."""
+    job = {"op": "transcribe", "audio": os.path.abspath(audio_path),
+           "output_dir": os.path.abspath(output_dir), **options}
+    for reply in _send(job, timeout=timeout):
+        if on_event:
+            on_event(reply)
+        if reply.get('type') == 'done':
+            return reply
+        if reply.get('type') == 'error':
+            raise RuntimeError(reply['error'])
+    raise RuntimeError("Whisper daemon closed the connection without a result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident Whisper transcription daemon")
+    parser.add_argument("--host", default=DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--chunk-workers", type=int, default=None,
+                        help="Processes for chunked jobs (defaults to the CPU count)")
+    parser.add_argument("--stdio", action="store_true", help="Serve JSON Lines on stdin/stdout instead of a socket")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    worker = WhisperWorker(args.model, args.language, args.chunk_workers)
+    worker.load()
+    try:
+        if args.stdio:
+            serve_stdio(worker)
+        else:
+            serve_socket(worker, args.host, args.port)
+    finally:
+        worker.chunked.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 const express = require('express');
+const axios = require('axios');
 const { supabase } = require('../db');
+const { CREW_SERVICE_URL, postToCrew, sendBusy } = require('../services/crewClient');
 const router = express.Router();
 
+// Tell the crew service its cached roster for this company is stale
+const invalidateRosterCache = (companyId) => {
+  axios.post(`${CREW_SERVICE_URL}/cache/roster/invalidate`, { company_id: companyId }, { timeout: 2000 })
+    .catch(err => console.warn('Roster cache invalidation failed:', err.message));
+};
+
 // Middleware to authenticate user and get company info
 const authenticateUser = async (req, res, next) => {
   try {
@@ -93,6 +101,8 @@ router.post('/employees', authenticateUser, async (req, res) => {
 
     if (error) throw error;
 
+    invalidateRosterCache(req.companyId);
+
     res.json({ employee });
   } catch (error) {
     console.error('Employee creation error:', error);
@@ -100,6 +110,68 @@ router.post('/employees', authenticateUser, async (req, res) => {
   }
 });
 
+// Process a transcript and pass the crew service's progress events (SSE) straight through
+router.post('/process-transcript/stream', authenticateUser, async (req, res) => {
+  const { transcript, meta = {}, engine } = req.body;
+  if (!transcript) {
+    return res.status(400).json({ error: 'transcript is required' });
+  }
+
+  try {
+    const upstream = await postToCrew('/process-transcript/stream', {
+      transcript,
+      company_id: req.companyId,
+      user_id: req.user.id,
+      meta,
+      engine
+    }, { responseType: 'stream', timeout: 0 });
+
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    // pipe() doesn't forward source errors; an unhandled one would crash the API
+    upstream.data.on('error', (error) => {
+      console.error('Transcript stream upstream error:', error.message);
+      if (!res.writableEnded) {
+        res.end(`event: error\ndata: ${JSON.stringify({ error: 'AI service connection lost', success: false })}\n\n`);
+      }
+    });
+    upstream.data.pipe(res);
+    // Browser went away: stop reading (the crew service still saves the meeting)
+    res.on('close', () => upstream.data.destroy());
+  } catch (error) {
+    console.error('Transcript stream error:', error.message);
+    if (sendBusy(res, error)) return;
+    res.status(error.response ? error.response.status : 502).json({ error: error.message });
+  }
+});
+
+// Bulk import: process many transcripts in one crew service call
+router.post('/process-transcripts', authenticateUser, async (req, res) => {
+  const { transcripts, engine } = req.body;
+  if (!Array.isArray(transcripts) || transcripts.length === 0) {
+    return res.status(400).json({ error: 'transcripts must be a non-empty array' });
+  }
+
+  try {
+    const response = await postToCrew('/process-transcripts', {
+      transcripts,
+      company_id: req.companyId,
+      user_id: req.user.id,
+      engine
+    }, { timeout: 0 });
+    res.json(response.data);
+  } catch (error) {
+    const status = error.response ? error.response.status : 502;
+    console.error('Batch transcript error:', error.message);
+    if (sendBusy(res, error)) return;
+    res.status(status).json({ error: error.response ? error.response.data.error : error.message });
+  }
+});
+
 // Get company meetings
 router.get('/meetings', authenticateUser, async (req, res) => {
   try {
@@ -504,6 +576,8 @@ router.post('/employees', authenticateUser, async (req, res) => {
 
     if (error) throw error;
 
+    invalidateRosterCache(req.companyId);
+
     res.json({ employee });
   } catch (error) {
     console.error('Employee creation error:', error);
@@ -536,6 +610,8 @@ router.put('/employees/:id', authenticateUser, async (req, res) => {
 
     if (updateError) throw updateError;
 
+    invalidateRosterCache(req.companyId);
+
     res.json({ employee });
   } catch (error) {
     console.error('Employee update error:', error);
@@ -556,6 +632,8 @@ router.delete('/employees/:id', authenticateUser, async (req, res) => {
 
     if (deleteError) throw deleteError;
 
+    invalidateRosterCache(req.companyId);
+
     res.json({ success: true });
   } catch (error) {
     console.error('Employee delete error:', error);
@@ -126,8 +126,8 @@ app.post('/api/meetings/upload', upload.single('meeting'), async (req, res) => {
     }
     const transcriptFile = path.join(transcriptsDir, req.file.filename + '.txt');
 
-    // Transcribe the file
-    exec(`python controllers/transcribe.py "${filePath}"`, { cwd: __dirname }, async (error, stdout, stderr) => {
+    // Transcribe the file with whichever backend is currently fastest
+    exec(`python controllers/transcribe_router.py "${filePath}"`, { cwd: __dirname }, async (error, stdout, stderr) => {
       if (stderr) console.log("Transcription error:", stderr);
       
       if (error && !stdout) {
@@ -10,6 +10,7 @@ const axios = require('axios');
 const nodemailer = require('nodemailer');
 const GmailService = require('./services/gmailService');
 const GmailPollingService = require('./services/gmailPollingService');
+const { postToCrew, sendBusy } = require('./services/crewClient');
 
 const app = express();
 const PORT = process.env.PORT || 5000;
@@ -325,36 +326,18 @@ app.post('/api/meetings/upload', upload.single('meeting'), async (req, res) => {
       fs.mkdirSync(transcriptsDir);
     }
 
-    // Transcribe the file using HF Space with fallback
-    exec(`python controllers/transcribe_hf.py "${filePath}"`, { cwd: __dirname }, async (error, stdout, stderr) => {
+    // Transcribe the file; the router picks between the HF Space and local
+    // Whisper based on recent latency and skips backends whose circuit is open
+    exec(`python controllers/transcribe_router.py "${filePath}"`, { cwd: __dirname }, async (error, stdout, stderr) => {
       if (stderr) console.log("Transcription debug:", stderr);
       
-      let transcript = stdout ? stdout.trim() : null;
+      const transcript = !error && stdout ? stdout.trim() : null;
       
-      // If HF Space fails, try fallback transcription
-      if (error || !transcript) {
-        console.log("HF Space failed, trying fallback transcription...");
-        
-        try {
-          const fallbackResult = await new Promise((resolve, reject) => {
-            exec(`python controllers/transcribe_openai.py "${filePath}"`, { cwd: __dirname }, (error, stdout, stderr) => {
-              if (error) {
-                reject(error);
-              } else {
-                resolve(stdout.trim());
-              }
-            });
-          });
-          
-          transcript = fallbackResult;
-          console.log("Fallback transcription successful");
-        } catch (fallbackError) {
-          return res.status(500).json({ 
-            message: 'Both primary and fallback transcription failed', 
-            error: stderr || error.message,
-            fallbackError: fallbackError.message
-          });
-        }
+      if (error) {
+        return res.status(500).json({ 
+          message: 'Transcription failed', 
+          error: (stdout && stdout.trim()) || stderr || error.message
+        });
       }
 
       if (!transcript) {
@@ -388,7 +371,8 @@ app.post('/api/meetings/upload', upload.single('meeting'), async (req, res) => {
 
       try {
         // Call AI agent with company context
-        const aiResponse = await axios.post('http://localhost:5001/process-transcript', {
+        // Waits out short busy spells (429 + Retry-After) before giving up
+        const aiResponse = await postToCrew('/process-transcript', {
           transcript: transcript,
           company_id: companyId,
           user_id: user.id,
@@ -502,6 +486,10 @@ app.post('/api/meetings/upload', upload.single('meeting'), async (req, res) => {
 
       } catch (crewError) {
         console.error('Crew agent error:', crewError);
+        // Still busy after the retries: tell the client when to try again
+        if (sendBusy(res, crewError, { message: 'Meeting saved but the AI service is busy', meeting: meetingData })) {
+          return;
+        }
         res.json({
           success: false,
           message: 'Meeting saved but AI processing failed',
@@ -1152,6 +1140,10 @@ app.post('/api/debug/add-employees', async (req, res) => {
       return res.status(500).json({ error: 'Failed to add employees', details: insertError.message });
     }
 
+    // Drop the crew service's cached roster for this company
+    axios.post('http://localhost:5001/cache/roster/invalidate', { company_id: profile.company_id }, { timeout: 2000 })
+      .catch(err => console.warn('Roster cache invalidation failed:', err.message));
+
     res.json({ success: true, employees });
   } catch (error) {
     console.error('Add employees error:', error);
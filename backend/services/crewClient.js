@@ -0,0 +1,60 @@
+// services/crewClient.js
+const axios = require('axios');
+
+const CREW_SERVICE_URL = process.env.CREW_SERVICE_URL || 'http://localhost:5001';
+// The crew service answers 429 with Retry-After while every processing slot is busy
+const CREW_BUSY_RETRIES = parseInt(process.env.CREW_BUSY_RETRIES || '2', 10);
+const CREW_BUSY_MAX_WAIT_MS = parseInt(process.env.CREW_BUSY_MAX_WAIT_MS || '10000', 10);
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const isBusy = (error) => Boolean(error.response && error.response.status === 429);
+
+/**
+ * Milliseconds the crew service asked us to wait (seconds or an HTTP date)
+ */
+function retryAfterMs(error) {
+  const header = error.response.headers['retry-after'];
+  const seconds = Number(header);
+  if (header && Number.isFinite(seconds)) {
+    return Math.max(0, seconds * 1000);
+  }
+  const date = Date.parse(header);
+  return Number.isNaN(date) ? 1000 : Math.max(0, date - Date.now());
+}
+
+/**
+ * POST to the crew service. A busy (429) answer is retried up to
+ * CREW_BUSY_RETRIES times, honouring Retry-After as long as it is no longer
+ * than CREW_BUSY_MAX_WAIT_MS; any other error is thrown straight away.
+ */
+async function postToCrew(path, body, options = {}) {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await axios.post(`${CREW_SERVICE_URL}${path}`, body, options);
+    } catch (error) {
+      if (!isBusy(error) || attempt >= CREW_BUSY_RETRIES) throw error;
+      const wait = retryAfterMs(error);
+      if (wait > CREW_BUSY_MAX_WAIT_MS) throw error;
+      console.warn(`⏳ Crew service busy, retrying ${path} in ${wait} ms`);
+      await sleep(wait);
+    }
+  }
+}
+
+/**
+ * If error is the crew service still being busy, reply 503 with its
+ * Retry-After so the client backs off, and return true
+ */
+function sendBusy(res, error, extra = {}) {
+  if (!isBusy(error)) return false;
+  res.set('Retry-After', error.response.headers['retry-after'] || '1');
+  res.status(503).json({ error: 'AI service is busy, try again shortly', ...extra });
+  return true;
+}
+
+module.exports = {
+  CREW_SERVICE_URL,
+  postToCrew,
+  sendBusy
+};
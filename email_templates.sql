@@ -0,0 +1,17 @@
+-- Per-company overrides for the task assignment emails
+-- The crew service renders emails from these templates (or its defaults)
+-- instead of asking the model to write them.
+-- Placeholders: $employee_name, $first_name, $employee_email, $task,
+-- $deadline, $due, $meeting_summary
+
+CREATE TABLE IF NOT EXISTS email_templates (
+  company_id UUID PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+  subject TEXT,
+  body TEXT,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Add comments for documentation
+COMMENT ON TABLE email_templates IS 'Task assignment email templates, one row per company; NULL columns use the default';
+COMMENT ON COLUMN email_templates.subject IS 'string.Template subject, e.g. Task Assignment: $task';
+COMMENT ON COLUMN email_templates.body IS 'string.Template body';
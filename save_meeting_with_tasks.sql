@@ -0,0 +1,111 @@
+-- Single round trip for the crew service's meeting + tasks write
+-- Resolves action-item emails against the company roster, creates missing
+-- employees in one statement and inserts every task, all in one transaction.
+
+-- One employee per email within a company, ignoring case like the lookups
+-- below (needed for ON CONFLICT).
+--
+-- Creating the index fails if the table already holds the same email twice
+-- in a company, so check first and stop with the duplicates named. Merge them
+-- before re-running, e.g. for each duplicate keep one row, then
+--   UPDATE tasks SET employee_id = <kept id> WHERE employee_id = <other id>;
+--   DELETE FROM employees WHERE id = <other id>;
+-- Find them with:
+--   SELECT company_id, lower(email), array_agg(id) FROM employees
+--   GROUP BY company_id, lower(email) HAVING count(*) > 1;
+DO $$
+DECLARE
+  v_duplicates TEXT;
+BEGIN
+  SELECT string_agg(d.company_id || '/' || d.email, ', ')
+  INTO v_duplicates
+  FROM (
+    SELECT company_id, lower(email) AS email FROM employees
+    WHERE email IS NOT NULL
+    GROUP BY company_id, lower(email) HAVING count(*) > 1
+  ) d;
+  IF v_duplicates IS NOT NULL THEN
+    RAISE EXCEPTION 'Duplicate employee emails, merge them first: %', v_duplicates;
+  END IF;
+END $$;
+
+-- Replaces the case-sensitive index earlier versions of this file created
+DROP INDEX IF EXISTS idx_employees_company_email;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_employees_company_lower_email ON employees(company_id, lower(email));
+
+CREATE OR REPLACE FUNCTION save_meeting_with_tasks(
+  p_company_id employees.company_id%TYPE,
+  p_meeting_id meetings.id%TYPE,
+  p_meeting JSONB,
+  p_action_items JSONB
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_meeting_id meetings.id%TYPE := p_meeting_id;
+  v_tasks JSONB;
+  v_employees_created INTEGER;
+BEGIN
+  -- Create the meeting, or update the summary of one the Node API already saved
+  IF v_meeting_id IS NULL THEN
+    INSERT INTO meetings (filename, transcript, summary, user_id, company_id)
+    SELECT m.filename, m.transcript, m.summary, m.user_id, p_company_id
+    FROM jsonb_populate_record(NULL::meetings, p_meeting) m
+    RETURNING id INTO v_meeting_id;
+  ELSE
+    UPDATE meetings SET summary = p_meeting->>'summary' WHERE id = v_meeting_id;
+  END IF;
+
+  -- Create employees for emails the roster doesn't know yet
+  INSERT INTO employees (email, name, company_id)
+  SELECT DISTINCT ON (lower(i.employee_email))
+         i.employee_email,
+         coalesce(nullif(i.employee_name, ''), split_part(i.employee_email, '@', 1)),
+         p_company_id
+  FROM jsonb_to_recordset(p_action_items) AS i(employee_email TEXT, employee_name TEXT)
+  WHERE coalesce(i.employee_email, '') <> ''
+    AND NOT EXISTS (
+      SELECT 1 FROM employees e
+      WHERE e.company_id = p_company_id AND lower(e.email) = lower(i.employee_email)
+    )
+  ON CONFLICT DO NOTHING;
+  -- The caller only needs to drop its roster cache when this is > 0
+  GET DIAGNOSTICS v_employees_created = ROW_COUNT;
+
+  WITH items AS (
+    SELECT i.employee_email, i.employee_name, i.task, i.deadline, i.ord
+    FROM jsonb_to_recordset(p_action_items) WITH ORDINALITY
+         AS i(employee_email TEXT, employee_name TEXT, task TEXT, deadline TEXT, ord BIGINT)
+  ), resolved AS (
+    SELECT items.*, e.id AS employee_id, e.name AS employee_db_name
+    FROM items
+    LEFT JOIN LATERAL (
+      SELECT id, name FROM employees e
+      WHERE e.company_id = p_company_id AND lower(e.email) = lower(items.employee_email)
+      LIMIT 1
+    ) e ON TRUE
+  ), inserted AS (
+    INSERT INTO tasks (meeting_id, employee_id, task_description, due_date, status, company_id)
+    SELECT v_meeting_id, r.employee_id, coalesce(r.task, ''), r.deadline::DATE, 'pending', p_company_id
+    FROM resolved r
+    ORDER BY r.ord
+    RETURNING id
+  )
+  SELECT jsonb_agg(jsonb_build_object(
+           'meeting_id', v_meeting_id,
+           'employee_id', r.employee_id,
+           'task_description', coalesce(r.task, ''),
+           'due_date', r.deadline,
+           'status', 'pending',
+           'company_id', p_company_id,
+           'assigned_to', coalesce(r.employee_db_name, r.employee_name, r.employee_email)
+         ) ORDER BY r.ord)
+  INTO v_tasks
+  FROM resolved r;
+
+  RETURN jsonb_build_object('meeting_id', v_meeting_id, 'tasks', coalesce(v_tasks, '[]'::JSONB),
+                            'employees_created', v_employees_created);
+END;
+$$;
+
+COMMENT ON FUNCTION save_meeting_with_tasks IS 'Meeting upsert, employee creation and task insert for the crew service in one call';